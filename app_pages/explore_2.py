@@ -37,18 +37,7 @@ def generate_explore_2():
         st.markdown("YEAH THIS WORKS FOR NOW")
     else:
         gainers_rank_to_filter = 5
-        stocks_df = pd.DataFrame(
-            columns=['Date', 'Close', 'ticker']
-        )
-        
-        for ticker in stock_tickers:
-            ticker_df = dmh__i.get_ystock_data_over_time(ticker)
-            ticker_df.reset_index(inplace=True)
-            ticker_df.rename(columns={'index': 'Date'}, inplace=True)
-            ticker_df = ticker_df[['Date', 'Close', 'ticker']]
-            stocks_df = pd.concat([stocks_df, ticker_df], ignore_index=True)
-        
-        gains = dmh__i.calculate_percentage_gain(stocks_df)
+        gains = dmh__i.latest_snapshot(stock_tickers).dropna(subset=['pct_change']).reset_index()
         gains['rank'] = gains['pct_change'].rank(method='dense', ascending=False)
         
         top_gainers_list = (
@@ -7,11 +7,13 @@ import yfinance as yf
 import plotly.graph_objs as go
 
 from helpers.data_manipulation_helpers import DataManipulationHelpers
+from helpers.recommendation_helpers import rs__i
 from data.configs import STOCK_TICKERS_DICT
 
 from components.page_components.explore_page_components import (
     generate_todays_top_gainers_section,
     generate_trending_section,
+    generate_seasonal_peaks_section,
     generate_browse_and_compare_section,
     generate_popular_portfolio_stocks_section,
     generate_browse_and_compare_section
@@ -46,18 +48,8 @@ def generate_explore_page():
     
     else:
         gainers_rank_to_filter = 5
-        stocks_df = pd.DataFrame(
-            columns=['Date', 'Close', 'ticker']
-        )
-        
-        for ticker in stock_tickers:
-            ticker_df = dmh__i.get_ystock_data_over_time(ticker)
-            ticker_df.reset_index(inplace=True)
-            ticker_df.rename(columns={'index': 'Date'}, inplace=True)
-            ticker_df = ticker_df[['Date', 'Close', 'ticker']]
-            stocks_df = pd.concat([stocks_df, ticker_df], ignore_index=True)
-        
-        gains = dmh__i.calculate_percentage_gain(stocks_df)
+        snapshot_df = rs__i.get_latest_snapshot()
+        gains = snapshot_df.dropna(subset=['pct_change']).reset_index()
         gains['rank'] = gains['pct_change'].rank(method='dense', ascending=False)
         
         top_gainers_list = (
@@ -80,12 +72,17 @@ def generate_explore_page():
         generate_popular_portfolio_stocks_section()
         
         # Yesterday's Top Gainers
+        # only the gainers being charted need their history
+        price_panel = dmh__i.get_price_panel(top_gainers_list)
         generate_todays_top_gainers_section(
             top_gainers_list,
-            stocks_df,
-            gains,
+            price_panel,
+            gains.set_index('ticker'),
             STOCK_TICKERS_DICT
         )
         
         # Trending now
-        generate_trending_section(STOCK_TICKERS_DICT)
\ No newline at end of file
+        generate_trending_section(STOCK_TICKERS_DICT)
+        
+        # Entering their seasonal peak
+        generate_seasonal_peaks_section(STOCK_TICKERS_DICT)
\ No newline at end of file
@@ -13,12 +13,11 @@ import plotly.graph_objs as go
 import plotly.express as px
 
 from helpers.data_manipulation_helpers import DataManipulationHelpers
+from helpers.indicator_helpers import ih__i
 from helpers.llm_helpers import LLMHelpers
 from helpers.plotting_helpers import PlottingHelpers
+from helpers.recommendation_helpers import rs__i
 from data.configs import STOCK_TICKERS_DICT
-from app_secrets.current_user_config import (
-    USER_RISK_LEVEL
-)
 
 load_dotenv()
 users_config_path = os.getenv('USERS_CONFIG_LOCATION')
@@ -33,17 +32,6 @@ with open(users_config_path) as file:
     users_config = yaml.load(file, Loader=SafeLoader)
 users_info = users_config['credentials']['usernames']
 
-## NOTE: turning this off for now because it REALLY NEEDS to be batch processing
-# stock_association_rules = dmh__i.gen_association_rules()
-
-fy_recommendations = dmh__i.claculate_fy_recommended_stocks(USER_RISK_LEVEL)['recommended_stocks']
-fy_quick_recommendations = dmh__i.claculate_fy_recommended_stocks(USER_RISK_LEVEL, quick_fy=True)['recommended_stocks']
-
-fy_buys = list(fy_recommendations['buys']['ticker'])
-fy_sells = list(fy_recommendations['sells']['ticker'])
-fy_quick_buys = list(fy_quick_recommendations['buys']['ticker'])
-fy_quick_sells = list(fy_quick_recommendations['sells']['ticker'])
-
 today = datetime.today()
 months_mapping = {
     1: 'January',
@@ -151,7 +139,7 @@ def string_format_big_number(num):
     
 def generate_todays_top_gainers_section(
     gainers_list,
-    ticker_df,
+    price_panel,
     gains_df,
     STOCK_TICKERS_DICT    
 ):
@@ -170,15 +158,12 @@ def generate_todays_top_gainers_section(
     gain_rank = 1
     for ticker in gainers_list:
         company = STOCK_TICKERS_DICT[ticker]
-        pct_gain = (
-            round(list(gains_df[gains_df['ticker']==ticker]
-            ['pct_change'])[0], 2)
-        )
+        pct_gain = round(gains_df.loc[ticker, 'pct_change'], 2)
         
         line_color = 'green' if pct_gain >=0 else 'red'
         gain_sign = '+' if pct_gain >=0 else '-'
         
-        history = ticker_df[ticker_df['ticker']==ticker][['Date', 'Close']]
+        history = price_panel.get_ticker_frame(ticker, ['Close'])
         
         st.markdown(
             f"""### `#{gain_rank} {company} ({ticker}), {gain_sign}{pct_gain}%`
@@ -208,21 +193,9 @@ def generate_trending_section(
     """
     """
     all_stocks = list(STOCK_TICKERS_DICT.keys())
-    trending_df = pd.DataFrame(
-        columns=['Date', 'Volume', 'ticker']
-    )
     
-    for ticker in all_stocks:
-        ticker_df = dmh__i.get_ystock_data_over_time(
-            ticker,
-            start_date='most recent trading day'
-        )
-        ticker_df.reset_index(inplace=True)
-        ticker_df.rename(columns={'index': 'Date'}, inplace=True)
-        ticker_df = ticker_df[['Date', 'Volume', 'ticker']]
-        trending_df = pd.concat([trending_df, ticker_df], ignore_index=True)
-    
-    trending_df = trending_df.drop_duplicates(subset='ticker')
+    trending_df = rs__i.get_latest_snapshot().reindex(all_stocks).reset_index()
+    trending_df = trending_df.dropna(subset=['Volume'])
     trending_df['rank'] = trending_df['Volume'].rank(method='dense', ascending=False)
     trending_stocks = list(
         trending_df[trending_df['rank']<11]
@@ -269,6 +242,57 @@ def generate_trending_section(
             )
     
 
+def generate_seasonal_peaks_section(
+    STOCK_TICKERS_DICT
+):
+    """
+    """
+    # stocks whose typical seasonal peak falls in the current or the next month
+    current_month = today.month
+    seasonal_peaks = []
+    for ticker, seasonality_summary in rs__i.get_seasonality_summaries().items():
+        typical_peak_month = seasonality_summary['seasonality']['typical_peak_month']
+        if (ticker not in STOCK_TICKERS_DICT) or pd.isna(typical_peak_month):
+            continue
+        months_to_peak = (int(typical_peak_month) - current_month) % 12
+        if months_to_peak <= 1:
+            seasonal_peaks.append((months_to_peak, typical_peak_month, ticker))
+    seasonal_peaks = sorted(seasonal_peaks)[:10]
+    
+    if len(seasonal_peaks) == 0:
+        return
+    
+    st.markdown("## Entering Their Seasonal Peak 📈")
+    st.markdown('---')
+    st.markdown(
+        f"""
+        These stocks have historically peaked around this time of year, based on the cyclical
+        behavior of their prices over the past few years.
+        
+        Seasonal patterns do not always repeat, so use them alongside other indicators and
+        your investment strategy.
+        """
+    )
+    
+    for row_start in range(0, len(seasonal_peaks), 5):
+        seasonal_peaks_placeholder = st.empty()
+        with seasonal_peaks_placeholder.container():
+            columns = st.columns(5)
+            for i, (months_to_peak, typical_peak_month, ticker) in enumerate(seasonal_peaks[row_start:row_start + 5]):
+                typical_peak_month_remainder = typical_peak_month - int(typical_peak_month)
+                if typical_peak_month_remainder <= 0.25:
+                    when_is_peak_period_occurring = "Early"
+                elif typical_peak_month_remainder < 0.75:
+                    when_is_peak_period_occurring = "Mid"
+                else:
+                    when_is_peak_period_occurring = "Late"
+                columns[i].metric(
+                    label=f"{ticker}",
+                    value=f"{when_is_peak_period_occurring}-{months_mapping[int(typical_peak_month)][:3]}",
+                    delta=None
+                )
+    
+
 def generate_popular_portfolio_stocks_section():
     """
     """
@@ -329,6 +353,10 @@ def generate_technical_graphs_section(
     odf.rename(columns={'Close': 'value'}, inplace=True)
     odf['label'] = ['Actual Price'] * len(odf)
     avg_stock_price = stock_df['Close'].mean()
+
+    # every indicator below is read off the ticker's engine and cached per parameter set,
+    # so moving a slider no longer recomputes rolling windows or EMAs over the full history
+    ih__i.get_indicator_engine(ticker, stock_df['Date'], stock_df['Close'])
     
     # Moving Avg section
     if 'Moving Average' in metrics:
@@ -349,9 +377,9 @@ def generate_technical_graphs_section(
         )
         ma_periods = st.slider('Select Moving Average Periods', min_value=7, max_value=250, value=[7, 100], step=1)
         for period in ma_periods:
-            ma_df = stock_df[['Date', 'Close']].sort_values('Date', ascending=True).tail(500)
-            ma_df['value'] = ma_df['Close'].rolling(window=period).mean()
-            ma_df = ma_df[['Date', 'value']].dropna()
+            # the MA only starts `period` bars into the 500 shown
+            ma_df = ih__i.get_indicator(ticker, 'moving_average', (period,)).tail(500)
+            ma_df = ma_df.iloc[period - 1:].dropna().copy()
             ma_df['label'] = [f"{period}-Day MA"] * len(ma_df)
             odf = pd.concat([odf, ma_df], ignore_index=True)
             
@@ -401,11 +429,10 @@ def generate_technical_graphs_section(
         macd_fast_period = st.slider('Select The MACD Fast Period', min_value=7, value=12, max_value=250, step=1)
         macd_slow_period = st.slider('Select The MACD Slow Period', min_value=7, value=26, max_value=250, step=1)
         
-        macd_df = dmh__i.calculate_macd(
-            stock_df[['Date', 'Close']],
-            macd_signal_period,
-            macd_fast_period,
-            macd_slow_period
+        macd_df = ih__i.get_indicator(
+            ticker,
+            'macd',
+            (macd_signal_period, macd_fast_period, macd_slow_period)
         )
         macd_df = macd_df.tail(macd_slow_period + 60)
         
@@ -475,8 +502,8 @@ def generate_technical_graphs_section(
         rsi_overbought_level = st.slider('Select Overbought Level', min_value=0, value=70, max_value=100, step=1)
         rsi_oversold_level = st.slider('Select Oversold Level', min_value=0, value=30, max_value=100, step=1)
         
-        rsi_df = dmh__i.calculate_rsi(stock_df[['Date', 'Close']], rsi_period)
-        rsi_df = rsi_df[['Date', 'RSI']].tail(rsi_period + 60)
+        rsi_df = ih__i.get_indicator(ticker, 'rsi', (rsi_period,))
+        rsi_df = rsi_df.tail(rsi_period + 60)
         
         rsi_fig = go.Figure()
         rsi_fig.add_trace(
@@ -546,8 +573,8 @@ def generate_technical_graphs_section(
         bollinger_period = st.slider('Select The Moving Average Period', min_value=7, max_value=250, value=20, step=1)
         bollinger_n_stddevs = st.slider('Select The Number of Standard Deviations', min_value=1, value=2, max_value=5, step=1)
         
-        bollinger_df = dmh__i.calculate_bollinger_bands(stock_df[['Date', 'Close']], bollinger_period, bollinger_n_stddevs)
-        bollinger_df = bollinger_df[['Date', 'ma_line', 'upper_band', 'lower_band']].tail(bollinger_period + 60)
+        bollinger_df = ih__i.get_indicator(ticker, 'bollinger_bands', (bollinger_period, bollinger_n_stddevs))
+        bollinger_df = bollinger_df.tail(bollinger_period + 60)
         
         bollinger_fig = go.Figure()
         bollinger_fig.add_trace(
@@ -614,6 +641,12 @@ def generate_browse_and_compare_section(
         stocks_df = pd.concat([stocks_df, ticker_df], ignore_index=True)
     
     if len(stocks_to_view)==1:
+        fy_scores_df = rs__i.get_fy_scores()
+        fy_buys = list(fy_scores_df.index[fy_scores_df['fy_prediction']==True])
+        fy_sells = list(fy_scores_df.index[fy_scores_df['fy_prediction']==False])
+        fy_quick_buys = list(fy_scores_df.index[fy_scores_df['quick_fy_prediction']==True])
+        fy_quick_sells = list(fy_scores_df.index[fy_scores_df['quick_fy_prediction']==False])
+        
         # if in buys, can be in quick_buys or quick_sells
         if (stocks_to_view[0] in fy_buys) and (stocks_to_view[0] in fy_quick_buys):
             st.markdown("`Predicted to increase in the short-term and over the next few months`")
@@ -635,11 +668,11 @@ def generate_browse_and_compare_section(
             st.write(f"Overall sell: {stocks_to_view[0] in fy_sells}, {fy_sells}")
         
         # plotting time series decomp
-        if len(stocks_df) >= 504:
-            stock_ts_decomp = dmh__i.calculate_ts_decomposition(stocks_df, stocks_to_view[0])
-            st.plotly_chart(ph__i.plot_stock_decomposition(stock_ts_decomp, stocks_to_view[0]))
+        seasonality_summary = rs__i.get_seasonality_summary(stocks_to_view[0])
+        if seasonality_summary is not None:
+            st.plotly_chart(ph__i.plot_stock_decomposition(stocks_to_view[0]))
             
-            cycle_information = dmh__i.generate_sesonality_information(stock_ts_decomp)
+            cycle_information = seasonality_summary['seasonality']
             typical_peak_month, typical_trough_month = cycle_information['typical_peak_month'], cycle_information['typical_trough_month']
             
             typical_peak_month_whole = int(typical_peak_month)
@@ -779,16 +812,15 @@ def generate_browse_and_compare_section(
         if show_technical_graphs:
             generate_technical_graphs_section(stocks_df, stocks_to_view[0])
         
-        ## NOTE: turning this off for now because it REALLY NEEDS to be batch processing 
-        # # investors who have ticker_x also have ticker_y
-        # investors_also_have = dmh__i.gen_investors_also_bought(stock_association_rules, stocks_to_view[0])
-        # if investors_also_have is not None:
-        #     consequent = investors_also_have.iloc[0]['consequents']
-        #     consequent_str = ' + '.join(list(consequent))
+        # investors who have ticker_x also have ticker_y
+        investors_also_have = rs__i.get_investors_also_bought(stocks_to_view[0])
+        if investors_also_have is not None:
+            # one code span per consequent, tickers held together joined by +
+            consequent_str = ', '.join(f"```{' + '.join(x)}```" for x in investors_also_have)
             
-        #     st.write("### Investors Also Have")
-        #     st.write("---")
-        #     st.write(f"TradeSocial investors who have `{stocks_to_view[0]}` in their portfolio also have ```{consequent_str}```")
+            st.write("### Investors Also Have")
+            st.write("---")
+            st.write(f"TradeSocial investors who have `{stocks_to_view[0]}` in their portfolio also have {consequent_str}")
         
     else:
         # plotting performance over time
@@ -831,11 +863,11 @@ def generate_browse_and_compare_section(
     st.markdown("### More Like This")
     st.markdown('---')
     
-    all_similarities_df = dmh__i.calculate_similarity()
+    neighbour_index = rs__i.get_neighbour_index()
     more_like_this = []
     
     for ticker in stocks_to_view:
-        similar_stocks = list(all_similarities_df[ticker].sort_values(ascending=False).index[1:4])
+        similar_stocks = neighbour_index.get_neighbours(ticker, 3)
         more_like_this = more_like_this + similar_stocks
     
     more_like_this = list(dict.fromkeys(more_like_this))
@@ -16,7 +16,8 @@ import streamlit as st
 import plotly.graph_objs as go
 import plotly.express as px
 
-from helpers.data_manipulation_helpers import DataManipulationHelpers
+from helpers.data_manipulation_helpers import DataManipulationHelpers, tc__i
+from helpers.recommendation_helpers import rs__i
 from data.configs import (
     STOCK_TICKERS_DICT
 )
@@ -39,10 +40,6 @@ current_user_config_path = os.getenv('CURRENT_USERS_CONFIG_LOCATION')
 
 # ----- TradeSocial Home Page Components -----
 portfolio = USER_PORTFOLIO
-fy_recommendations = dmh__i.claculate_fy_recommended_stocks(USER_RISK_LEVEL)['recommended_stocks'] # risk level is not currently being used
-fy_quick_recommendations = dmh__i.claculate_fy_recommended_stocks(USER_RISK_LEVEL, quick_fy=True)['recommended_stocks'] # risk level is not currently being used
-ymal_recommendation_dict = dmh__i.calculate_ymal_recommended_stocks(USER_RISK_LEVEL)
-all_similarities_df = dmh__i.calculate_similarity()
 
 personalization_evolution_note = """
 This feature is powered by AI algorithms and adapts to your preferences and behavior.
@@ -187,7 +184,15 @@ def gen_track_my_portfolio_goal_section(
     today = datetime.today()
     goal_date = datetime.strptime(goal_date, "%Y-%m-%d")
     
-    time_remaining_until_goal_date = (goal_date - today).days
+    # counting trading sessions in (today, goal_date] since returns only compound on those;
+    # goal dates past the trading calendar fall back to ~252 sessions per 365 days
+    try:
+        time_remaining_until_goal_date = tc__i.count_sessions_between(
+            today.date() + relativedelta(days=1),
+            goal_date.date() + relativedelta(days=1)
+        )
+    except ValueError:
+        time_remaining_until_goal_date = round((goal_date - today).days * 252 / 365)
     
     if len(portfolio_over_time) > 0:
         
@@ -202,14 +207,18 @@ def gen_track_my_portfolio_goal_section(
         )
         
         pct_increase_needed = 100 * (goal - current_portfolio_value) / current_portfolio_value
-        daily_pct_increase_needed = pct_increase_needed / time_remaining_until_goal_date
+        daily_pct_increase_needed = pct_increase_needed / max(time_remaining_until_goal_date, 1)
         risk_level_daily_pct = risk_level_mappings[risk_level]
         next_risk_level_daily_pct = risk_level_mappings[risk_level+1]
         
         estimated_days_required = math.log(goal / current_portfolio_value) / math.log(1 + (risk_level_daily_pct/100))
         estimated_days_difference = estimated_days_required - time_remaining_until_goal_date
-        new_goal_date = goal_date + relativedelta(days=estimated_days_difference + 30)
-        push_goal_date = today + relativedelta(days=252)
+        # pushing the goal out by the missing sessions plus roughly a month (21 sessions) of buffer
+        try:
+            new_goal_date = tc__i.session_offset(goal_date.date(), math.ceil(estimated_days_difference) + 21)
+        except ValueError:
+            new_goal_date = goal_date.date() + relativedelta(days=math.ceil((estimated_days_difference + 21) * 365 / 252))
+        push_goal_date = tc__i.session_offset(today.date(), 252)
 
         new_goal = round(current_portfolio_value * ((1 + (risk_level_daily_pct/100)) ** time_remaining_until_goal_date), 0)
         if new_goal >= goal:
@@ -238,7 +247,7 @@ def gen_track_my_portfolio_goal_section(
                 )
                 st.markdown(
                     f"""
-                    You are currently at ${current_portfolio_value:,.2f} with {time_remaining_until_goal_date} days
+                    You are currently at ${current_portfolio_value:,.2f} with {time_remaining_until_goal_date} trading days
                     remaining until your goal date.
                     """
                 )
@@ -261,7 +270,7 @@ def gen_track_my_portfolio_goal_section(
                 st.markdown(
                     f"""
                     Your are currently at ${current_portfolio_value:,.2f}, and you are on track to achieve your goal since
-                    you have {time_remaining_until_goal_date} days remaining until your deadline.
+                    you have {time_remaining_until_goal_date} trading days remaining until your deadline.
                     
                     Remember that the stock market is volatile and things can change quickly. Be sure to keep an eye on your
                     portfolio's value as well as your recommended trades to give you the best chance at success.
@@ -388,7 +397,6 @@ def generate_my_portfolio_section():
 
 def generate_update_my_portfolio_section():
     st.markdown("### Update My Portfolio")
-    # stock_association_rules = dmh__i.gen_association_rules()
     st.error(
         f"""
         **NOTE**: TradeSocial currently does not have the functionality to support the actual
@@ -411,11 +419,8 @@ def generate_update_my_portfolio_section():
         transaction_type = st.selectbox('Transaction Type', ['Buy', 'Sell'])
         submit_button = st.form_submit_button(label='Update Portfolio')
         
-        # # NOTE: turning this off for now because it REALLY NEEDS to be batch processing
-        # investors_also_bought = dmh__i.gen_investors_also_bought(
-        #     stock_association_rules,
-        #     ticker
-        # )
+        # a lookup, from the precomputed rules or the live co-holding counts
+        investors_also_bought = rs__i.get_investors_also_bought(ticker)
         
         if submit_button:
             portfolo_update_counter += 1
@@ -425,11 +430,10 @@ def generate_update_my_portfolio_section():
             else:
                 st.success(f"Purchased {STOCK_TICKERS_DICT[ticker]} ({ticker})!")
                 
-                # # NOTE: turning this off for now because it REALLY NEEDS to be batch processing
-                # if investors_also_bought is not None:
-                #     consequent = investors_also_bought.iloc[0]['consequents']
-                #     consequent_str = ' + '.join(list(consequent))
-                #     st.write(f"TradeSocial investors who purchased `{ticker}` also purchased ```{consequent_str}```")
+                if investors_also_bought is not None:
+                    # one code span per consequent, tickers held together joined by +
+                    consequent_str = ', '.join(f"```{' + '.join(x)}```" for x in investors_also_bought)
+                    st.write(f"TradeSocial investors who purchased `{ticker}` also purchased {consequent_str}")
                     
             st.error(
                 f"""
@@ -458,6 +462,7 @@ def generate_update_my_portfolio_section():
             
             with open(users_config_path, 'w') as file:
                 yaml.dump(users_config, file, default_flow_style=False)
+            rs__i.update_co_holdings(USER_USERNAME, portfolio)
             
 
 def generate_portfolio_sells_section(
@@ -470,8 +475,8 @@ def generate_portfolio_sells_section(
     if len(portfolio_over_time) > 0:
         portfolio_metrics_df = calculate_my_portfolio_metrics()
         stocks_in_my_portfolio = list(portfolio.keys())
-        long_sells = list(fy_recommendations['sells']['ticker'])
-        quick_sells = list(fy_quick_recommendations['sells']['ticker'])
+        long_sells = list(rs__i.get_fy_recommendations()['sells']['ticker'])
+        quick_sells = list(rs__i.get_fy_recommendations(quick_fy=True)['sells']['ticker'])
         
         for ticker in stocks_in_my_portfolio:
             if (ticker in quick_sells) and (ticker in long_sells) and (len(portfolio_sells) < 9):
@@ -545,19 +550,18 @@ def generate_quick_wins_section(
     portfolio_over_time = calculate_my_portfolio_metrics_over_time()
     if len(portfolio_over_time) > 0:
         stocks_in_my_portfolio = list(portfolio.keys())
-        fy_recs = fy_quick_recommendations['buys']
-        stocks_in_ymal = ymal_recommendation_dict['recommended_stocks']
+        fy_recommendations = rs__i.get_fy_recommendations()
+        neighbour_index = rs__i.get_neighbour_index()
+        fy_recs = rs__i.get_fy_recommendations(quick_fy=True)['buys']
+        stocks_in_ymal = rs__i.get_ymal_recommendations(USER_RISK_LEVEL)['recommended_stocks']
         stocks_in_fy_buys = fy_recommendations['buys']['ticker'][:8]
         stocks_in_fy_sells = fy_recommendations['sells']['ticker'][:8]
         
-        my_portfolio_similarity_filtered = all_similarities_df[stocks_in_my_portfolio]
-        similar_to_my_portfolio = all_similarities_df.copy()
-        similar_to_my_portfolio['avg_similarity'] = my_portfolio_similarity_filtered.mean(axis=1)
         similar_to_my_portfolio = (
-            similar_to_my_portfolio
-            .sort_values('avg_similarity', ascending=False)
+            neighbour_index
+            .get_average_similarity(stocks_in_my_portfolio)
+            .sort_values(ascending=False)
             .reset_index()
-            [['ticker', 'avg_similarity']]
         )
         
         fy = (
@@ -634,6 +638,9 @@ def generate_fy_section(
     portfolio_over_time = calculate_my_portfolio_metrics_over_time()
     if len(portfolio_over_time) > 0:
         stocks_in_my_portfolio = list(portfolio.keys())
+        fy_recommendations = rs__i.get_fy_recommendations()
+        fy_quick_recommendations = rs__i.get_fy_recommendations(quick_fy=True)
+        neighbour_index = rs__i.get_neighbour_index()
         
         if fy_buys:
             section_header = 'Recommended Buys For You'
@@ -659,14 +666,11 @@ def generate_fy_section(
             fy_recs = fy_recommendations['sells']
             stocks_in_opposite_quick_fy = fy_quick_recommendations['buys']['ticker']
         
-        my_portfolio_similarity_filtered = all_similarities_df[stocks_in_my_portfolio]
-        similar_to_my_portfolio = all_similarities_df.copy()
-        similar_to_my_portfolio['avg_similarity'] = my_portfolio_similarity_filtered.mean(axis=1)
         similar_to_my_portfolio = (
-            similar_to_my_portfolio
-            .sort_values('avg_similarity', ascending=False)
+            neighbour_index
+            .get_average_similarity(stocks_in_my_portfolio)
+            .sort_values(ascending=False)
             .reset_index()
-            [['ticker', 'avg_similarity']]
         )
         
         fy = (
@@ -682,7 +686,7 @@ def generate_fy_section(
         st.write(fy_msg)
         
         # deduplicating for stocks that will be in YMAL
-        stocks_in_ymal = ymal_recommendation_dict['recommended_stocks']
+        stocks_in_ymal = rs__i.get_ymal_recommendations(USER_RISK_LEVEL)['recommended_stocks']
         recommended_stocks = list(
             fy[
                 (~fy['ticker'].isin(stocks_in_ymal)) &
@@ -831,9 +835,9 @@ def generate_ymal_section(
             """
         )
         st.markdown("---")
-        recommendation_dict = dmh__i.calculate_ymal_recommended_stocks(risk_level)
+        recommendation_dict = rs__i.get_ymal_recommendations(risk_level)
     else:
-        recommendation_dict = ymal_recommendation_dict
+        recommendation_dict = rs__i.get_ymal_recommendations(USER_RISK_LEVEL)
         
     risk_msg = recommendation_dict['risk_msg']
     recommended_stocks = recommendation_dict['recommended_stocks']
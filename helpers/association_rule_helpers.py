@@ -0,0 +1,254 @@
+# ----- Imports -----
+import pandas as pd
+import numpy as np
+from scipy import sparse
+
+import os
+from dotenv import load_dotenv
+import yaml
+from yaml.loader import SafeLoader
+import threading
+
+from mlxtend.frequent_patterns import fpgrowth, association_rules
+
+# ----- AssociationRuleHelpers -----
+
+load_dotenv()
+ASSOCIATION_RULES_MIN_SUPPORT = float(os.getenv('ASSOCIATION_RULES_MIN_SUPPORT', 0.01))
+# longest itemset mined, empty for no limit
+ASSOCIATION_RULES_MAX_LEN = int(os.getenv('ASSOCIATION_RULES_MAX_LEN', 0)) or None
+# 'rules' for the rules mined by the precompute job, 'counts' for the CoHoldingCounter,
+# which follows every portfolio update as it happens
+ASSOCIATION_BACKEND = os.getenv('ASSOCIATION_BACKEND', 'rules')
+users_config_path = os.getenv('USERS_CONFIG_LOCATION')
+
+class AssociationRuleIndex():
+    """
+    """
+
+    def __init__(
+        self,
+        rules
+    ):
+        """
+        """
+        # the mined rules, strongest (lift, then confidence) first, plus
+        # ticker -> positions of the rules with the ticker among their antecedents
+        self.rules = rules.sort_values(['lift', 'confidence'], ascending=False, kind='stable').reset_index(drop=True)
+        antecedent_positions = {}
+        for position, antecedents in enumerate(self.rules['antecedents']):
+            for ticker in antecedents:
+                antecedent_positions.setdefault(ticker, []).append(position)
+        self.antecedent_positions = {x: np.array(y, dtype=np.int64) for x, y in antecedent_positions.items()}
+
+    def __len__(
+        self
+    ):
+        """
+        """
+        return len(self.rules)
+
+    def get_rules(
+        self,
+        ticker
+    ):
+        """
+        """
+        # the rules with `ticker` among their antecedents, strongest first
+        return self.rules.iloc[self.antecedent_positions.get(ticker, np.array([], dtype=np.int64))]
+
+
+class AssociationRuleHelpers():
+    """
+    """
+
+    def __init__(
+        self,
+        min_support=ASSOCIATION_RULES_MIN_SUPPORT,
+        max_len=ASSOCIATION_RULES_MAX_LEN
+    ):
+        """
+        """
+        self.min_support = min_support
+        self.max_len = max_len
+
+    def read_portfolios(
+        self,
+        users_config_path
+    ):
+        """
+        """
+        # read on every run, so the rules follow portfolio updates made since start-up
+        with open(users_config_path) as file:
+            users_config = yaml.load(file, Loader=SafeLoader)
+        return {
+            x: sorted(self.get_held_tickers(y.get('portfolio')))
+            for x, y in users_config['credentials']['usernames'].items()
+        }
+
+    def get_held_tickers(
+        self,
+        portfolio
+    ):
+        """
+        """
+        # what "holding" a ticker means for both the mined rules and the CoHoldingCounter:
+        # its transactions add up to a positive quantity, so a closed position does not count
+        # `portfolio`: ticker -> list of {'quantity', 'transaction_date'} transactions
+        return set(
+            x for x, y in (portfolio or {}).items()
+            if sum(transaction['quantity'] for transaction in y) > 0
+        )
+
+    def build_holdings_matrix(
+        self,
+        portfolios
+    ):
+        """
+        """
+        # (n_users, n_tickers) sparse 0/1 matrix, one row per user (including users
+        # without holdings, who count towards support) and one column per held ticker
+        tickers = sorted(set(x for portfolio in portfolios.values() for x in portfolio))
+        ticker_positions = {x: i for i, x in enumerate(tickers)}
+        rows = [i for i, portfolio in enumerate(portfolios.values()) for _ in portfolio]
+        columns = [ticker_positions[x] for portfolio in portfolios.values() for x in portfolio]
+        holdings = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.uint8), (rows, columns)),
+            shape=(len(portfolios), len(tickers))
+        )
+        return holdings, tickers
+
+    def mine_rules(
+        self,
+        portfolios
+    ):
+        """
+        """
+        holdings, tickers = self.build_holdings_matrix(portfolios)
+        if holdings.shape[1] == 0:
+            return AssociationRuleIndex(pd.DataFrame(columns=['antecedents', 'consequents', 'lift', 'confidence']))
+
+        holdings_df = (
+            pd.DataFrame.sparse.from_spmatrix(holdings, columns=tickers)
+            .astype(pd.SparseDtype(bool, False))
+        )
+        frequent_itemsets = fpgrowth(holdings_df, min_support=self.min_support, use_colnames=True, max_len=self.max_len)
+        if len(frequent_itemsets) == 0:
+            return AssociationRuleIndex(pd.DataFrame(columns=['antecedents', 'consequents', 'lift', 'confidence']))
+        rules = association_rules(frequent_itemsets, metric="lift", min_threshold=0.01)
+        return AssociationRuleIndex(rules)
+
+
+class CoHoldingCounter():
+    """
+    """
+
+    def __init__(
+        self,
+        users_config_path=users_config_path
+    ):
+        """
+        """
+        # how many users hold each ticker and each pair of tickers, kept current one portfolio
+        # update at a time; pairs are stored both ways (ticker -> {other ticker: count}), so
+        # a ticker's co-holdings are read in O(number of tickers held alongside it); "held"
+        # as AssociationRuleHelpers.get_held_tickers, the same as for the mined rules
+        self.users_config_path = users_config_path
+        self.holdings = None
+        self.item_counts = {}
+        self.pair_counts = {}
+        self.lock = threading.Lock()
+
+    def ensure_loaded(
+        self
+    ):
+        """
+        """
+        # counting every portfolio in the users config once, on first use
+        if self.holdings is not None:
+            return
+        portfolios = arh__i.read_portfolios(self.users_config_path)
+        with self.lock:
+            if self.holdings is not None:
+                return
+            self.holdings = {}
+            for user, held_tickers in portfolios.items():
+                self.update_holdings(user, held_tickers)
+
+    def increment(
+        self,
+        ticker,
+        other_tickers,
+        step
+    ):
+        """
+        """
+        self.item_counts[ticker] = self.item_counts.get(ticker, 0) + step
+        if self.item_counts[ticker] == 0:
+            del self.item_counts[ticker]
+        for other_ticker in other_tickers:
+            for x, y in [(ticker, other_ticker), (other_ticker, ticker)]:
+                ticker_pair_counts = self.pair_counts.setdefault(x, {})
+                ticker_pair_counts[y] = ticker_pair_counts.get(y, 0) + step
+                if ticker_pair_counts[y] == 0:
+                    del ticker_pair_counts[y]
+
+    def update_holdings(
+        self,
+        user,
+        held_tickers
+    ):
+        """
+        """
+        # only the tickers that changed touch the counts: each added (removed) ticker
+        # pairs up with every ticker the user keeps holding
+        previous_tickers = self.holdings.get(user, set())
+        held_tickers = set(held_tickers)
+        kept_tickers = set(previous_tickers)
+        for ticker in previous_tickers - held_tickers:
+            kept_tickers.discard(ticker)
+            self.increment(ticker, kept_tickers, -1)
+        for ticker in held_tickers - previous_tickers:
+            self.increment(ticker, kept_tickers, 1)
+            kept_tickers.add(ticker)
+        self.holdings[user] = held_tickers
+
+    def update_portfolio(
+        self,
+        user,
+        portfolio
+    ):
+        """
+        """
+        # called whenever a transaction is recorded
+        self.ensure_loaded()
+        with self.lock:
+            self.update_holdings(user, arh__i.get_held_tickers(portfolio))
+
+    def get_also_held(
+        self,
+        ticker
+    ):
+        """
+        """
+        # "investors who hold `ticker` also hold ..." as ticker -> other ticker rules with
+        # support, confidence and lift, strongest (lift, then confidence) first
+        self.ensure_loaded()
+        with self.lock:
+            n_users = len(self.holdings)
+            ticker_count = self.item_counts.get(ticker, 0)
+            pair_counts = list(self.pair_counts.get(ticker, {}).items())
+            other_counts = [self.item_counts[x] for x, _ in pair_counts]
+
+        also_held_df = pd.DataFrame({
+            'ticker': [x for x, _ in pair_counts],
+            'count': np.array([y for _, y in pair_counts], dtype=np.int64)
+        })
+        also_held_df['support'] = also_held_df['count'] / max(n_users, 1)
+        also_held_df['confidence'] = also_held_df['count'] / max(ticker_count, 1)
+        also_held_df['lift'] = also_held_df['confidence'] / (np.array(other_counts, dtype=np.float64) / max(n_users, 1))
+        return also_held_df.sort_values(['lift', 'confidence'], ascending=False, kind='stable').reset_index(drop=True)
+
+
+arh__i = AssociationRuleHelpers()
+chc__i = CoHoldingCounter()
@@ -0,0 +1,168 @@
+# ----- Imports -----
+import pandas as pd
+import numpy as np
+
+from datetime import datetime
+
+import sys
+import threading
+from collections import OrderedDict
+
+# ----- CacheHelpers -----
+
+class LRUCache():
+    """
+    """
+
+    def __init__(
+        self,
+        max_entries=1024,
+        max_bytes=None
+    ):
+        """
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def size_of(
+        self,
+        value
+    ):
+        """
+        """
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return int(value.memory_usage(index=True).sum())
+        if isinstance(value, np.ndarray) or hasattr(value, 'nbytes'):
+            return int(value.nbytes)
+        return sys.getsizeof(value)
+
+    def is_expired(
+        self,
+        entry
+    ):
+        """
+        """
+        return False
+
+    def get(
+        self,
+        key,
+        default=None
+    ):
+        """
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or self.is_expired(entry):
+                if entry is not None:
+                    self.remove(key)
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry['value']
+
+    def set(
+        self,
+        key,
+        value,
+        **entry_info
+    ):
+        """
+        """
+        entry = {'value': value, 'size': self.size_of(value), **entry_info}
+        with self.lock:
+            if key in self.entries:
+                self.remove(key)
+            self.entries[key] = entry
+            self.total_bytes += entry['size']
+
+            # evicting the least recently used entries until back within bounds
+            while len(self.entries) > 1 and (
+                (len(self.entries) > self.max_entries) or
+                (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+            ):
+                self.remove(next(iter(self.entries)))
+
+    def remove(
+        self,
+        key
+    ):
+        """
+        """
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry['size']
+
+    def invalidate(
+        self,
+        key=None
+    ):
+        """
+        """
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+                self.total_bytes = 0
+            elif key in self.entries:
+                self.remove(key)
+
+    def stats(
+        self
+    ):
+        """
+        """
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'total_bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+class MarketCloseTTLCache(LRUCache):
+    """
+    """
+
+    def __init__(
+        self,
+        trading_calendar,
+        max_entries=1024,
+        max_bytes=None
+    ):
+        """
+        """
+        super().__init__(max_entries=max_entries, max_bytes=max_bytes)
+        self.trading_calendar = trading_calendar
+
+    def next_market_close(
+        self
+    ):
+        """
+        """
+        return self.trading_calendar.get_next_data_ready_time()
+
+    def is_expired(
+        self,
+        entry
+    ):
+        """
+        """
+        return datetime.now(entry['expires_at'].tzinfo) >= entry['expires_at']
+
+    def set(
+        self,
+        key,
+        value,
+        expires_at=None
+    ):
+        """
+        """
+        # bars cannot change until the next close, so that is when entries expire
+        expires_at = self.next_market_close() if expires_at is None else expires_at
+        super().set(key, value, expires_at=expires_at)
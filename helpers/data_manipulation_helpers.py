@@ -7,24 +7,28 @@ from dateutil.relativedelta import relativedelta
 import time
 import pytz
 
-import joblib
 import os
 from dotenv import load_dotenv
 import yaml
 from yaml.loader import SafeLoader
 
-import yfinance as yf
-
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import StandardScaler
-
 from scipy.spatial.distance import cdist
 
-from statsmodels.tsa.seasonal import seasonal_decompose
-
-from mlxtend.frequent_patterns import apriori, association_rules
-
 from data.configs import STOCK_TICKERS_DICT
+from helpers.price_store_helpers import PriceStore
+from helpers.cache_helpers import MarketCloseTTLCache
+from helpers.trading_calendar_helpers import TradingCalendar
+from helpers.fetch_executor_helpers import FetchExecutor
+from helpers.market_data_provider_helpers import get_market_data_provider
+from helpers.price_panel_helpers import PricePanel
+from helpers.model_registry_helpers import mr__i
+from helpers.feature_store_helpers import FeatureStore
+from helpers.indicator_helpers import ih__i
+from helpers.similarity_helpers import SIMILARITY_BACKEND, se__i
+from helpers.seasonality_helpers import sh__i
+from helpers.decomposition_helpers import DECOMPOSITION_BACKEND, DECOMPOSITION_WORKERS, dh__i
+from helpers.association_rule_helpers import arh__i
+from helpers.embedding_store_helpers import StockEmbeddingStore
 
 # ----- DataManipulationHelpers -----
 
@@ -37,6 +41,19 @@ with open(users_config_path) as file:
     users_config = yaml.load(file, Loader=SafeLoader)
 users_info = users_config['credentials']['usernames']
 
+tc__i = TradingCalendar()
+ps__i = PriceStore()
+# process-wide, so every Streamlit session shares the same price frames
+pfc__i = MarketCloseTTLCache(tc__i, max_entries=4096, max_bytes=512 * 1024 * 1024)
+# shared by every session so identical in-flight downloads collapse into one
+fe__i = FetchExecutor()
+# yfinance by default, or recorded fixtures via MARKET_DATA_PROVIDER=replay
+mdp__i = get_market_data_provider()
+# model inputs materialized once per session
+fs__i = FeatureStore()
+# per-session stock embeddings when SIMILARITY_BACKEND=embeddings
+ses__i = StockEmbeddingStore()
+
 class DataManipulationHelpers():
     """
     """
@@ -46,20 +63,16 @@ class DataManipulationHelpers():
         """
         pass
     
-    def get_ystock_data_over_time(
+    def resolve_date_range(
         self,
-        ticker,
         start_date=None,
-        end_date='most recent trading day',
-        retries=10,
-        delay=5
+        end_date='most recent trading day'
     ):
         """
         """
         est_tz = pytz.timezone('US/Eastern')
         today = datetime.now(est_tz)
-        market_close =  datetime.strptime('16:30:00', '%H:%M:%S').time()
-        current_time = datetime.now(est_tz).time()
+        most_recent_trading_day = tc__i.get_most_recent_closed_session(today)
         
         if isinstance(end_date, int):
             end_date = today + relativedelta(days=-end_date)
@@ -68,17 +81,8 @@ class DataManipulationHelpers():
             end_date = today + relativedelta(days=-1)
             
         if end_date in ['most recent trading day']:
-            if current_time > market_close:
-                end_date = today
-                day_of_week = end_date.weekday()
-            else:
-                end_date = today + relativedelta(days=-1)
-                day_of_week = end_date.weekday()
-            
-            if day_of_week == 6:
-                end_date = end_date + relativedelta(days=-2)
-            if day_of_week == 5:
-                end_date = end_date + relativedelta(days=-1)
+            # yfinance's end date is exclusive, so ending the day after includes the session
+            end_date = most_recent_trading_day + relativedelta(days=1)
             
         if isinstance(start_date, int):
             start_date = today + relativedelta(days=-start_date)
@@ -90,32 +94,236 @@ class DataManipulationHelpers():
             start_date = today + relativedelta(days=-1)
             
         if start_date in ['most recent trading day']:
-            if current_time > market_close:
-                start_date = today
-                day_of_week = start_date.weekday()
-            else:
-                start_date = today + relativedelta(days=-1)
-                day_of_week = start_date.weekday()
-                
-            if day_of_week == 6:
-                start_date = start_date + relativedelta(days=-2)
-            if day_of_week == 5:
-                start_date = start_date + relativedelta(days=-1)
+            start_date = most_recent_trading_day
+        
+        return start_date, end_date
+    
+    def resolve_download_range(
+        self,
+        start_date=None,
+        end_date='most recent trading day'
+    ):
+        """
+        """
+        start_date, end_date = self.resolve_date_range(start_date, end_date)
+        start_date = pd.Timestamp(start_date).date()
+        end_date = pd.Timestamp(end_date).date()
+        
+        # a range without any sessions (weekends, holidays, start == end) would come back
+        # empty, so it is moved to the most recent session on or before its start
+        if tc__i.count_sessions_between(start_date, max(start_date, end_date)) == 0:
+            start_date = tc__i.previous_session(start_date, inclusive=True)
+            end_date = start_date + relativedelta(days=1)
         
+        return start_date, end_date
+    
+    def get_ystock_data_over_time(
+        self,
+        ticker,
+        start_date=None,
+        end_date='most recent trading day',
+        columns=None,
+        retries=10,
+        delay=5
+    ):
+        """
+        """
+        return self.get_ystock_data_for_tickers(
+            [ticker],
+            start_date=start_date,
+            end_date=end_date,
+            columns=columns,
+            retries=retries,
+            delay=delay
+        )
+    
+    def get_ystock_data_for_tickers(
+        self,
+        tickers,
+        start_date=None,
+        end_date='most recent trading day',
+        columns=None,
+        chunk_size=50,
+        retries=10,
+        delay=5
+    ):
+        """
+        """
+        # one long frame in the same format as `get_ystock_data_over_time`,
+        # served from memory or the local price store, only fetching missing dates
+        tickers = list(dict.fromkeys(tickers))
+        columns = None if columns is None else tuple(x for x in columns if x != 'ticker')
+        if len(tickers) == 0:
+            empty_df = mdp__i.get_empty_frame()
+            return empty_df if columns is None else empty_df[list(columns) + ['ticker']]
+        start_date, end_date = self.resolve_download_range(start_date, end_date)
+        
+        cached_frames = {}
+        for ticker in tickers:
+            cached_df = pfc__i.get((ticker, start_date, end_date, columns))
+            if cached_df is not None:
+                cached_frames[ticker] = cached_df
+        
+        uncached_tickers = [x for x in tickers if x not in cached_frames]
+        if len(uncached_tickers) > 0:
+            stocks_df = self.get_stored_ystock_data(
+                uncached_tickers,
+                start_date,
+                end_date,
+                chunk_size=chunk_size,
+                retries=retries,
+                delay=delay
+            )
+            if columns is not None:
+                stocks_df = stocks_df[list(columns) + ['ticker']]
+            for ticker, ticker_df in stocks_df.groupby('ticker', sort=False):
+                pfc__i.set((ticker, start_date, end_date, columns), ticker_df)
+                cached_frames[ticker] = ticker_df
+            # symbols without data are cached empty, so they are not requested again until
+            # the next close
+            for ticker in uncached_tickers:
+                if ticker not in cached_frames:
+                    pfc__i.set((ticker, start_date, end_date, columns), stocks_df.iloc[:0])
+                    cached_frames[ticker] = stocks_df.iloc[:0]
+        
+        # callers mutate the returned frame, so it never aliases a cached entry; tickers
+        # without data are left out, and none at all gives an empty frame
+        ticker_dfs = [cached_frames[x] for x in tickers if not cached_frames[x].empty]
+        if len(ticker_dfs) == 0:
+            return cached_frames[tickers[0]].copy()
+        return pd.concat(ticker_dfs).copy()
+    
+    def get_price_panel(
+        self,
+        tickers=None,
+        start_date=None,
+        end_date='most recent trading day',
+        fields=('Close', 'Volume')
+    ):
+        """
+        """
+        # dates x tickers matrices shared by every analytic on the same range
+        tickers = list(STOCK_TICKERS_DICT.keys()) if tickers is None else list(dict.fromkeys(tickers))
+        fields = tuple(fields)
+        start_date, end_date = self.resolve_download_range(start_date, end_date)
+        
+        panel_key = ('price_panel', tuple(tickers), start_date, end_date, fields)
+        price_panel = pfc__i.get(panel_key)
+        if price_panel is None:
+            stocks_df = self.get_ystock_data_for_tickers(tickers, start_date, end_date)
+            price_panel = PricePanel.from_long_frame(stocks_df, tickers=tickers, fields=fields)
+            pfc__i.set(panel_key, price_panel)
+        return price_panel
+    
+    def latest_snapshot(
+        self,
+        tickers=None,
+        lookback_sessions=5
+    ):
+        """
+        """
+        # one row per ticker (last close, previous close, volume, pct change) for the most
+        # recent closed session, built once and served from memory until the next close
+        tickers = list(STOCK_TICKERS_DICT.keys()) if tickers is None else list(dict.fromkeys(tickers))
+        most_recent_session = tc__i.get_most_recent_closed_session()
+        
+        snapshot_key = ('latest_snapshot', tuple(tickers), most_recent_session)
+        snapshot_df = pfc__i.get(snapshot_key)
+        if snapshot_df is None:
+            # a few sessions back so tickers missing a bar still have a previous close
+            price_panel = self.get_price_panel(
+                tickers,
+                start_date=tc__i.session_offset(most_recent_session, -(lookback_sessions - 1))
+            )
+            last_closes, last_rows = price_panel.get_last_valid('Close', n_values=2)
+            last_volumes, _ = price_panel.get_last_valid('Volume')
+            snapshot_df = pd.DataFrame(
+                {
+                    'Date': price_panel.dates[last_rows[1]].where(last_rows[1] >= 0),
+                    'Close': last_closes[1],
+                    'previous_close': last_closes[0],
+                    'Volume': last_volumes[0],
+                    'pct_change': (last_closes[1] / last_closes[0] - 1) * 100
+                },
+                index=pd.Index(price_panel.tickers, name='ticker')
+            )
+            snapshot_df = snapshot_df.dropna(subset=['Close'])
+            pfc__i.set(snapshot_key, snapshot_df)
+        return snapshot_df
+    
+    def get_stored_ystock_data(
+        self,
+        tickers,
+        start_date,
+        end_date,
+        chunk_size=50,
+        retries=10,
+        delay=5
+    ):
+        """
+        """
+        # bars up to and including the most recent trading day will not change anymore
+        complete_until = tc__i.get_most_recent_closed_session() + relativedelta(days=1)
+        
+        # only transport errors (connection resets, timeouts, HTTP errors, all OSErrors) are
+        # retried; each retry only fetches the gaps the previous attempts left in the store
         for attempt in range(retries):
             try:
-                df = yf.download(ticker, start=start_date, end=end_date)
-                if df.empty:
-                    raise ValueError(f"No data fetched for {ticker}")
-                df.index = pd.to_datetime(df.index)
-                df['ticker'] = [ticker] * len(df)
-                return df
-            except (KeyError, ValueError, AttributeError) as e:
-                print(f"Failed at getting getting {ticker} data with error {e}. Will retry.")
-                if start_date == end_date:
-                    end_date = end_date + relativedelta(days=1)
+                missing_ranges = ps__i.find_missing_ranges(tickers, start_date, end_date)
+                gap_futures = []
+                for (gap_start, gap_end), gap_tickers in missing_ranges.items():
+                    # gaps made up only of weekends and holidays have nothing to fetch
+                    if tc__i.count_sessions_between(gap_start, gap_end) == 0:
+                        continue
+                    for i in range(0, len(gap_tickers), chunk_size):
+                        chunk_tickers = tuple(gap_tickers[i:i+chunk_size])
+                        gap_futures.append(fe__i.submit(
+                            ('ystock', chunk_tickers, gap_start, gap_end),
+                            self.fill_price_store_gap,
+                            list(chunk_tickers),
+                            gap_start,
+                            gap_end,
+                            complete_until,
+                            n_requests=len(chunk_tickers)
+                        ))
+                for gap_future in gap_futures:
+                    gap_future.result()
+                break
+            except OSError as e:
+                if attempt == retries - 1:
+                    raise RuntimeError(f"Failed at fetching data for {tickers} after {retries} attempts") from e
+                print(f"Failed at getting {tickers} data with error {e}. Will retry.")
                 time.sleep(delay)
-        raise RuntimeError(f"Failed at fetching data for {ticker} after {retries} attempts")
+        
+        # symbols without any bars (delisted, mistyped) are not retried, just left out
+        stocks_df = ps__i.read_bars(tickers, start_date, end_date)
+        fetched_tickers = set(stocks_df['ticker'])
+        empty_tickers = [x for x in tickers if x not in fetched_tickers]
+        if len(empty_tickers) > 0:
+            print(f"No data for {empty_tickers} between {start_date} and {end_date}, leaving them out.")
+        return stocks_df
+    
+    def fill_price_store_gap(
+        self,
+        tickers,
+        start_date,
+        end_date,
+        complete_until
+    ):
+        """
+        """
+        gap_df = self.download_ystock_data(tickers, start_date, end_date)
+        ps__i.write_bars(gap_df, start_date, end_date, complete_until)
+    
+    def download_ystock_data(
+        self,
+        tickers,
+        start_date,
+        end_date
+    ):
+        """
+        """
+        return mdp__i.download(tickers, start_date, end_date)
     
     def calculate_percentage_gain(
         self,
@@ -146,6 +354,24 @@ class DataManipulationHelpers():
         
         return gain_df
     
+    def calculate_panel_percentage_gain(
+        self,
+        price_panel,
+        value_col_name='Close'
+    ):
+        """
+        """
+        # same output as calculate_percentage_gain, read off the last two bars of each column
+        last_values, last_rows = price_panel.get_last_valid(value_col_name, n_values=2)
+        has_gain = last_rows[0] >= 0
+        gain_df = pd.DataFrame({
+            'Date': price_panel.dates[last_rows[1][has_gain]],
+            value_col_name: last_values[1][has_gain],
+            'ticker': np.array(price_panel.tickers, dtype=object)[has_gain],
+            'pct_change': (last_values[1][has_gain] / last_values[0][has_gain] - 1) * 100
+        })
+        return gain_df.sort_values('ticker').reset_index(drop=True)
+    
     def calculate_portfolio_value(
         self,
         portfolio_df
@@ -167,43 +393,115 @@ class DataManipulationHelpers():
         
         return flattened_portfolio
     
-    def claculate_fy_recommended_stocks(
+    def build_fy_features(
         self,
-        risk_level,
-        quick_fy=False
+        tickers=None,
+        start_date='most recent trading day',
+        end_date='most recent trading day'
     ):
         """
         """
-        if quick_fy:
-            fy_model = joblib.load(QUICK_FY_MODEL)
-        else:    
-            fy_model = joblib.load(FY_MODEL)
-        all_stocks = list(STOCK_TICKERS_DICT.keys())
-        stocks_df = pd.DataFrame(
-            columns=['Date', 'Close', 'Volume', 'ticker', 'RSI']
-        )
+        # one contiguous (n_tickers, 2) Close/Volume matrix from each ticker's latest bar
+        price_panel = self.get_price_panel(tickers, start_date, end_date)
+        _, last_rows = price_panel.get_last_valid('Close')
+        has_features = last_rows[0] >= 0
+        tickers = [x for x, y in zip(price_panel.tickers, has_features) if y]
+        rows = last_rows[0][has_features]
+        cols = np.flatnonzero(has_features)
+        
+        features = np.empty((len(tickers), 2))
+        features[:, 0] = price_panel.get('Close')[rows, cols]
+        features[:, 1] = price_panel.get('Volume')[rows, cols]
         
-        for ticker in all_stocks:
-            ticker_df = self.get_ystock_data_over_time(
-                ticker,
-                start_date='most recent trading day',
-                end_date='most recent trading day'
-            )
-            ticker_df.reset_index(inplace=True)
-            ticker_df.rename(columns={'index': 'Date'}, inplace=True)
-            ticker_df = ticker_df[['Date', 'Close', 'Volume', 'ticker']]
-            rsi_df = self.calculate_rsi(ticker_df)
-            stocks_df = pd.concat([stocks_df, rsi_df], ignore_index=True)
-
-        if quick_fy:
-            predictions = fy_model.predict(stocks_df[['Close', 'Volume', 'RSI']])
-            probabilities = fy_model.predict_proba(stocks_df[['Close', 'Volume', 'RSI']])
-        else:
-            predictions = fy_model.predict(stocks_df[['Close', 'Volume']])
-            probabilities = fy_model.predict_proba(stocks_df[['Close', 'Volume']])
+        return {
+            'tickers': tickers,
+            'dates': price_panel.dates[rows],
+            'feature_names': ['Close', 'Volume'],
+            'features': features
+        }
+    
+    def get_fy_features(
+        self,
+        tickers=None
+    ):
+        """
+        """
+        # the universe's features are read from the feature store, built on first use per session
+        if tickers is not None:
+            return self.build_fy_features(tickers)
+        return fs__i.get_or_build(tc__i.get_most_recent_closed_session(), self.build_fy_features)
+    
+    def predict_fy_model(
+        self,
+        fy_model,
+        features,
+        feature_names
+    ):
+        """
+        """
+        # labels come from the same predict_proba call, as predict would pick them
+        if hasattr(fy_model, 'feature_names_in_'):
+            features = pd.DataFrame(features, columns=feature_names, copy=False)
+        probabilities = fy_model.predict_proba(features)
+        best_classes = probabilities.argmax(axis=1)
+        return (
+            fy_model.classes_[best_classes],
+            probabilities[np.arange(len(best_classes)), best_classes]
+        )
+    
+    def score_fy_models(
+        self,
+        tickers=None
+    ):
+        """
+        """
+        # both FY models over one feature pass, one row per ticker
+        fy_features = self.get_fy_features(tickers)
+        features = fy_features['features']
+        fy_predictions, fy_probabilities = self.predict_fy_model(
+            mr__i.get(FY_MODEL),
+            features,
+            fy_features['feature_names']
+        )
+        # the quick FY model also takes RSI, which is NaN over a single-bar panel (see FEATURE_EXCLUSIONS)
+        rsi = np.full(len(features), np.nan)
+        quick_fy_predictions, quick_fy_probabilities = self.predict_fy_model(
+            mr__i.get(QUICK_FY_MODEL),
+            np.column_stack([features, rsi]),
+            fy_features['feature_names'] + ['RSI']
+        )
         
-        stocks_df['prediction'] = predictions
-        stocks_df['probability'] = probabilities.max(axis=1)
+        fy_scores_df = pd.DataFrame(
+            {
+                'Date': fy_features['dates'],
+                'Close': features[:, 0],
+                'Volume': features[:, 1],
+                'RSI': rsi,
+                'fy_prediction': fy_predictions,
+                'fy_probability': fy_probabilities,
+                'quick_fy_prediction': quick_fy_predictions,
+                'quick_fy_probability': quick_fy_probabilities
+            },
+            index=pd.Index(fy_features['tickers'], name='ticker')
+        )
+        return fy_scores_df
+    
+    def claculate_fy_recommended_stocks(
+        self,
+        risk_level,
+        quick_fy=False,
+        fy_scores_df=None
+    ):
+        """
+        """
+        fy_scores_df = self.score_fy_models() if fy_scores_df is None else fy_scores_df
+        score_prefix = 'quick_fy' if quick_fy else 'fy'
+        
+        stocks_df = fy_scores_df[['Date', 'Close', 'Volume']].reset_index()
+        stocks_df = stocks_df[['Date', 'Close', 'Volume', 'ticker']]
+        stocks_df['RSI'] = fy_scores_df['RSI'].to_numpy()
+        stocks_df['prediction'] = fy_scores_df[f'{score_prefix}_prediction'].to_numpy()
+        stocks_df['probability'] = fy_scores_df[f'{score_prefix}_probability'].to_numpy()
         recommended_buys = stocks_df[stocks_df['prediction']==True].sort_values('probability', ascending=False)
         recommended_sells = stocks_df[stocks_df['prediction']==False].sort_values('probability', ascending=False)
 
@@ -214,36 +512,33 @@ class DataManipulationHelpers():
             }
         }
         
-    def calculate_ymal_recommended_stocks(
-        self,
-        risk_level
+    def calculate_ymal_risk_table(
+        self
     ):
         """
         """
         all_stocks = list(STOCK_TICKERS_DICT.keys())
         
-        stocks_df = pd.DataFrame(
-            columns=['Date', 'Close', 'ticker']
+        price_panel = self.get_price_panel(
+            all_stocks,
+            start_date=7
         )
-        
-        for ticker in all_stocks:
-            ticker_df = self.get_ystock_data_over_time(
-                ticker,
-                start_date=7
-            )
-            ticker_df.reset_index(inplace=True)
-            ticker_df.rename(columns={'index': 'Date'}, inplace=True)
-            ticker_df = ticker_df[['Date', 'Close', 'ticker']]
-            stocks_df = pd.concat([stocks_df, ticker_df], ignore_index=True)
-        
-        stocks_df['pct_change'] = stocks_df.groupby('ticker')['Close'].pct_change()
+        has_prices = ~np.isnan(price_panel.get('Close')).all(axis=0)
+        
+        # sample std (ddof=1) of each column's daily returns, NaN with fewer than 2 returns
+        returns = price_panel.get_returns('Close')
+        n_returns = (~np.isnan(returns)).sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_returns = np.nansum(returns, axis=0) / n_returns
+            squared_deviations = np.nansum((returns - mean_returns) ** 2, axis=0)
+            volatility = np.where(n_returns > 1, np.sqrt(squared_deviations / (n_returns - 1)), np.nan)
         risk_df = (
-            stocks_df
-            .groupby('ticker')
-            .agg(
-                volatility = pd.NamedAgg('pct_change', 'std')
-            )
-            .reset_index()
+            pd.DataFrame({
+                'ticker': np.array(price_panel.tickers, dtype=object)[has_prices],
+                'volatility': volatility[has_prices]
+            })
+            .sort_values('ticker')
+            .reset_index(drop=True)
         )
         min_volatility = risk_df['volatility'].min()
         max_volatility = risk_df['volatility'].max()
@@ -253,7 +548,24 @@ class DataManipulationHelpers():
             risk_df['normalized_volatility'] = 10 * (risk_df['volatility'] - min_volatility) / (max_volatility - min_volatility)
         risk_df = risk_df.sort_values('normalized_volatility', ascending=False)
         
-        gain_df = self.calculate_percentage_gain(stocks_df)
+        gain_df = self.calculate_panel_percentage_gain(price_panel)
+        
+        return {
+            'risk_df': risk_df,
+            'recent_gain': gain_df
+        }
+    
+    def calculate_ymal_recommended_stocks(
+        self,
+        risk_level,
+        risk_table=None
+    ):
+        """
+        """
+        # the risk table does not depend on the user, so it can be computed ahead of time
+        risk_table = self.calculate_ymal_risk_table() if risk_table is None else risk_table
+        risk_df = risk_table['risk_df'].copy()
+        gain_df = risk_table['recent_gain']
         
         if risk_level <= 4:
             risk_msg = """
@@ -320,79 +632,38 @@ class DataManipulationHelpers():
     ):
         """
         """
-        scaler = StandardScaler()
+        # aligned on the panel's dates; see SimilarityEngine for the features and missing bars
         all_stocks = list(STOCK_TICKERS_DICT.keys())
-        
-        stocks_df = pd.DataFrame(
-            columns=['Date', 'Close', 'ticker']
-        )
-        
-        for ticker in all_stocks:
-            ticker_df = self.get_ystock_data_over_time(
-                ticker
-            )
-            ticker_df.reset_index(inplace=True)
-            ticker_df.rename(columns={'index': 'Date'}, inplace=True)
-            ticker_df = ticker_df[['Date', 'Close', 'ticker']]
-            stocks_df = pd.concat([stocks_df, ticker_df], ignore_index=True)
-            
-        stocks_df['Date'] = pd.to_datetime(stocks_df['Date'])
-        stocks_df['pct_change'] = stocks_df.groupby('ticker')['Close'].pct_change()
-        stocks_df.dropna(subset=['pct_change'], inplace=True)
-        
-        stocks_df['features'] = list(
-            zip(
-                stocks_df['Close'],
-                stocks_df['pct_change']
-            )
-        )
-        
-        grouped_features = stocks_df.groupby('ticker')['features'].apply(list)
-        
-        normalized_features = {}
-        for ticker, features in grouped_features.items():
-            normalized_features[ticker] = scaler.fit_transform(features)
-
-        normalized_features_list = [normalized_features[ticker] for ticker in all_stocks]
-        reshaped_features = [feat.flatten() for feat in normalized_features_list]
-        
-        similarity_matrix = cosine_similarity(
-            np.array(
-                reshaped_features
+        price_panel = self.get_price_panel(all_stocks)
+        return se__i.calculate_similarity(price_panel)
+    
+    def build_neighbour_index(
+        self
+    ):
+        """
+        """
+        # what the pages query for similar stocks: the top-k view of `calculate_similarity`,
+        # or the session's embeddings for universes too large for it
+        all_stocks = list(STOCK_TICKERS_DICT.keys())
+        if SIMILARITY_BACKEND == 'embeddings':
+            return ses__i.get_or_build(
+                tc__i.get_most_recent_closed_session(),
+                lambda: self.get_price_panel(all_stocks)
             )
-        )
-        similarity_df = pd.DataFrame(
-            similarity_matrix,
-            columns=grouped_features.keys(),
-            index=grouped_features.keys()
-        )
-        return similarity_df
+        if SIMILARITY_BACKEND != 'neighbours':
+            raise ValueError(f"Unknown SIMILARITY_BACKEND '{SIMILARITY_BACKEND}', expected 'neighbours' or 'embeddings'")
+        price_panel = self.get_price_panel(all_stocks)
+        return se__i.build_neighbour_index(price_panel)
     
     def gen_association_rules(
         self
     ):
         """
         """
-        users = list(users_info.keys())
-        portfolio_stocks = []
-        
-        for user in users:
-            user_portfolio = set(users_info[user]['portfolio'].keys())
-            portfolio_stocks.append(user_portfolio)
-        
-        unique_stocks = sorted(
-            set(
-                stock for portfolio in portfolio_stocks for stock in portfolio
-            )
-        )
-        one_hot_encoded = pd.DataFrame(
-            [[stock in portfolio for stock in unique_stocks] for portfolio in portfolio_stocks],
-            columns=unique_stocks,
-            index=users
-        )
-        frequent_itemsets = apriori(one_hot_encoded, min_support=0.01, use_colnames=True)
-        rules = association_rules(frequent_itemsets, metric="lift", min_threshold=0.01)
-        return rules
+        # FP-growth over the sparse user x ticker holdings, indexed by antecedent ticker;
+        # run by the precompute job rather than on page loads
+        portfolios = arh__i.read_portfolios(users_config_path)
+        return arh__i.mine_rules(portfolios)
     
     def gen_investors_also_bought(
         self,
@@ -401,7 +672,8 @@ class DataManipulationHelpers():
     ):
         """
         """
-        target_stock_rules = rules[rules['antecedents'].apply(lambda x: target_stock in x)]
+        # `rules`: the AssociationRuleIndex from `gen_association_rules`
+        target_stock_rules = rules.get_rules(target_stock)
         if target_stock_rules.empty:
             return None
         else:
@@ -416,7 +688,8 @@ class DataManipulationHelpers():
         self,
         data,
         ticker,
-        decomp_value='Close'
+        decomp_value='Close',
+        backend=DECOMPOSITION_BACKEND
     ):
         """
         """
@@ -427,61 +700,50 @@ class DataManipulationHelpers():
         data_by_date = data.set_index('Date')
         data_by_date = data_by_date.sort_index()
         
-        decomposition = seasonal_decompose(
-            data_by_date[decomp_value],
-            model='multiplicative',
-            period=252
-        )
+        decomposition = dh__i.decompose(data_by_date[decomp_value], backend=backend)
         return decomposition
     
+    def get_ts_decomposition(
+        self,
+        ticker,
+        start_date='2020-06-10',
+        backend=DECOMPOSITION_BACKEND
+    ):
+        """
+        """
+        # decomposed at most once per ticker and session
+        def compute_decomposition():
+            price_panel = self.get_price_panel([ticker], start_date=start_date, fields=('Close',))
+            return self.calculate_ts_decomposition(price_panel.get_ticker_frame(ticker, ['Close']), ticker, backend=backend)
+        
+        session = tc__i.get_most_recent_closed_session()
+        return dh__i.get_decomposition(ticker, session, compute_decomposition, backend=backend)
+    
+    def calculate_seasonality_summaries(
+        self,
+        tickers=None,
+        start_date='2020-06-10',
+        n_workers=DECOMPOSITION_WORKERS
+    ):
+        """
+        """
+        # decomposition and seasonality information for every ticker with 2+ years of bars,
+        # decomposed across DECOMPOSITION_WORKERS processes
+        session = tc__i.get_most_recent_closed_session()
+        price_panel = self.get_price_panel(tickers, start_date=start_date, fields=('Close',))
+        seasonality_summaries = dh__i.summarize_panel(price_panel, n_workers=n_workers)
+        for ticker, seasonality_summary in seasonality_summaries.items():
+            dh__i.add_decomposition(ticker, session, seasonality_summary['decomposition'])
+        return seasonality_summaries
+    
     def generate_sesonality_information(
         self,
         decomposition
     ):
         """
         """
-        crossings = []
-        days_between_crossings = []
-        seasonal = decomposition.seasonal
-        seasonal_mean = seasonal.mean()
-        
-        seasonal_df = seasonal.reset_index()
-        seasonal_df['month'] = seasonal_df['Date'].dt.month
-        seasonal_df['year'] = seasonal_df['Date'].dt.year
-        
-        typical_peak_month = (
-            seasonal_df
-            .groupby('year')
-            .apply(lambda x: x.loc[x['seasonal'].idxmax()]['month'])[:-1].mean()
-        )
-        typical_trough_month = (
-            seasonal_df
-            .groupby('year')
-            .apply(lambda x: x.loc[x['seasonal'].idxmin()]['month'])[:-1].mean()
-        )
-        
-        for i in range(1, len(seasonal)):
-            if (
-                ((seasonal[i-1] < seasonal_mean) and (seasonal[i] > seasonal_mean)) or
-                ((seasonal[i-1] > seasonal_mean) and (seasonal[i] < seasonal_mean))
-            ):
-                crossings.append(seasonal.index[i])
-        
-        for i in range(1, len(crossings)):
-            days_between = (crossings[i] - crossings[i-1]).days
-            if days_between > 62:
-                days_between_crossings.append(days_between)
-        
-        
-        
-        estimated_cycle_length = (np.mean(days_between_crossings)) * 2
-        output = {
-            'seasonal_mean': seasonal_mean,
-            'typical_peak_month': typical_peak_month + 0.001,
-            'typical_trough_month': typical_trough_month + 0.001,
-            'estimated_cycle_length': estimated_cycle_length
-        }
-        return output
+        # mean, typical peak/trough months and cycle length of the seasonal component
+        return sh__i.generate_seasonality_information(decomposition.seasonal)
 
     def calculate_rsi(
         self,
@@ -490,18 +752,9 @@ class DataManipulationHelpers():
     ):
         """
         """
-        original_cols = list(df.columns)
-        output_cols = original_cols + ['RSI']
         df = df.sort_values('Date', ascending=True)
-        df['price_change'] = df['Close'].diff()
-        df['gain'] = df['price_change'].apply(lambda x: x if x > 0 else 0)
-        df['loss'] = df['price_change'].apply(lambda x: -x if x < 0 else 0)
-        df['avg_gain'] = df['gain'].rolling(window=period, min_periods=1).mean()
-        df['avg_loss'] = df['loss'].rolling(window=period, min_periods=1).mean()
-        
-        df['RS'] = df['avg_gain'] / df['avg_loss']
-        df['RSI'] = 100 - (100 / (1 + df['RS']))
-        return df[output_cols]
+        df['RSI'] = ih__i.calculate_panel_rsi(df['Close'].to_numpy(dtype=np.float64), period)
+        return df
     
     def calculate_macd(
         self,
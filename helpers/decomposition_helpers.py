@@ -0,0 +1,286 @@
+# ----- Imports -----
+import pandas as pd
+import numpy as np
+
+import os
+from dotenv import load_dotenv
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+
+from statsmodels.tsa.seasonal import seasonal_decompose
+
+from helpers.cache_helpers import LRUCache
+from helpers.seasonality_helpers import sh__i
+
+# ----- DecompositionHelpers -----
+
+load_dotenv()
+# 'daily' decomposes every bar with a yearly (252 bar) season, as before; 'weekly'
+# decomposes Friday closes with a 52 week season in about half the time
+DECOMPOSITION_BACKEND = os.getenv('DECOMPOSITION_BACKEND', 'daily')
+# backend -> seasonal period in bars
+DECOMPOSITION_PERIODS = {
+    'daily': 252,
+    'weekly': 52,
+}
+# worker processes for batch decompositions, 0 for one per CPU and 1 to stay in-process
+DECOMPOSITION_WORKERS = int(os.getenv('DECOMPOSITION_WORKERS', 0)) or os.cpu_count() or 1
+# tickers need two full years of daily bars to be decomposed
+DECOMPOSITION_MIN_BARS = 504
+
+class Decomposition():
+    """
+    """
+
+    def __init__(
+        self,
+        dates,
+        observed,
+        trend,
+        seasonal_cycle,
+        backend
+    ):
+        """
+        """
+        # a multiplicative decomposition kept compactly: observed and trend as float32, the
+        # seasonal component as the single cycle it repeats (float64, so summaries computed
+        # from it are unchanged) and the residual derived on access; exposes the same
+        # Date-indexed observed/trend/seasonal/resid series as statsmodels' DecomposeResult
+        self.dates = np.asarray(dates, dtype='datetime64[ns]')
+        self.observed_values = np.asarray(observed, dtype=np.float32)
+        self.trend_values = np.asarray(trend, dtype=np.float32)
+        self.seasonal_cycle = np.asarray(seasonal_cycle, dtype=np.float64)
+        self.backend = backend
+
+    @property
+    def nbytes(
+        self
+    ):
+        """
+        """
+        return self.dates.nbytes + self.observed_values.nbytes + self.trend_values.nbytes + self.seasonal_cycle.nbytes
+
+    def get_series(
+        self,
+        values,
+        name
+    ):
+        """
+        """
+        return pd.Series(values, index=pd.DatetimeIndex(self.dates, name='Date'), name=name)
+
+    @property
+    def observed(
+        self
+    ):
+        """
+        """
+        return self.get_series(self.observed_values.astype(np.float64), 'Close')
+
+    @property
+    def trend(
+        self
+    ):
+        """
+        """
+        return self.get_series(self.trend_values.astype(np.float64), 'trend')
+
+    @property
+    def seasonal(
+        self
+    ):
+        """
+        """
+        # np.resize repeats the cycle over every date
+        return self.get_series(np.resize(self.seasonal_cycle, len(self.dates)), 'seasonal')
+
+    @property
+    def resid(
+        self
+    ):
+        """
+        """
+        return self.get_series(
+            self.observed_values / (self.trend_values.astype(np.float64) * np.resize(self.seasonal_cycle, len(self.dates))),
+            'resid'
+        )
+
+
+class DecompositionHelpers():
+    """
+    """
+
+    def __init__(self):
+        """
+        """
+        # (ticker, session, backend) -> Decomposition; a new session changes the key, so
+        # stale decompositions are never served and just age out
+        self.decomposition_cache = LRUCache(max_entries=1024, max_bytes=128 * 1024 * 1024)
+
+    def resample_weekly(
+        self,
+        close
+    ):
+        """
+        """
+        # as close.resample('W-FRI').last().dropna(), without resample's overhead, which
+        # costs about as much as the weekly decomposition itself
+        close = close.dropna()
+        dates = pd.DatetimeIndex(close.index)
+        week_ends = dates + pd.to_timedelta((4 - dates.weekday) % 7, unit='D')
+        is_week_last = np.append(week_ends[1:] != week_ends[:-1], True)
+        return pd.Series(close.to_numpy()[is_week_last], index=week_ends[is_week_last].rename('Date'), name=close.name)
+
+    def decompose(
+        self,
+        close,
+        backend=DECOMPOSITION_BACKEND
+    ):
+        """
+        """
+        # `close`: a Date-indexed, sorted series of closes
+        period = DECOMPOSITION_PERIODS[backend]
+        if backend == 'weekly':
+            close = self.resample_weekly(close)
+
+        decomposition = seasonal_decompose(
+            close,
+            model='multiplicative',
+            period=period
+        )
+        return Decomposition(
+            close.index,
+            close.to_numpy(),
+            decomposition.trend.to_numpy(),
+            decomposition.seasonal.to_numpy()[:period],
+            backend
+        )
+
+    def add_decomposition(
+        self,
+        ticker,
+        session,
+        decomposition
+    ):
+        """
+        """
+        self.decomposition_cache.set((ticker, session, decomposition.backend), decomposition)
+
+    def get_decomposition(
+        self,
+        ticker,
+        session,
+        compute_fn,
+        backend=DECOMPOSITION_BACKEND
+    ):
+        """
+        """
+        decomposition = self.decomposition_cache.get((ticker, session, backend))
+        if decomposition is None:
+            decomposition = compute_fn()
+            self.add_decomposition(ticker, session, decomposition)
+        return decomposition
+
+    def summarize_close(
+        self,
+        dates,
+        close,
+        backend=DECOMPOSITION_BACKEND
+    ):
+        """
+        """
+        # {'decomposition', 'seasonality'} for one ticker's closes, None when there are
+        # too few bars or a multiplicative model cannot decompose them (non-positive closes)
+        is_valid = ~np.isnan(close)
+        if is_valid.sum() < DECOMPOSITION_MIN_BARS:
+            return None
+        try:
+            decomposition = self.decompose(
+                pd.Series(close[is_valid], index=pd.DatetimeIndex(dates[is_valid], name='Date'), name='Close'),
+                backend=backend
+            )
+        except ValueError:
+            return None
+        return {
+            'decomposition': decomposition,
+            'seasonality': sh__i.generate_seasonality_information(decomposition.seasonal)
+        }
+
+    def summarize_panel(
+        self,
+        price_panel,
+        backend=DECOMPOSITION_BACKEND,
+        n_workers=DECOMPOSITION_WORKERS,
+        chunk_size=128
+    ):
+        """
+        """
+        # ticker -> summarize_close of every ticker in the panel, across `n_workers` processes;
+        # the Close panel is handed over through shared memory instead of being pickled
+        close = price_panel.get('Close')
+        dates = price_panel.dates.to_numpy()
+        n_tickers = len(price_panel.tickers)
+        n_workers = min(n_workers, max(n_tickers // chunk_size, 1))
+        if n_workers <= 1:
+            summaries = [self.summarize_close(dates, close[:, i], backend) for i in range(n_tickers)]
+        else:
+            shared_close = shared_memory.SharedMemory(create=True, size=max(close.nbytes, 1))
+            try:
+                shared_close_values = np.ndarray(close.shape, dtype=np.float64, buffer=shared_close.buf, order='F')
+                shared_close_values[:] = close
+                # spawned rather than forked, the app process runs threads
+                with ProcessPoolExecutor(
+                    max_workers=n_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_decomposition_worker,
+                    initargs=(shared_close.name, close.shape, dates, backend)
+                ) as executor:
+                    column_chunks = [range(x, min(x + chunk_size, n_tickers)) for x in range(0, n_tickers, chunk_size)]
+                    summaries = [y for x in executor.map(summarize_shared_columns, column_chunks) for y in x]
+                del shared_close_values
+            finally:
+                shared_close.close()
+                shared_close.unlink()
+
+        return {x: y for x, y in zip(price_panel.tickers, summaries) if y is not None}
+
+
+dh__i = DecompositionHelpers()
+
+# ----- Decomposition workers -----
+
+# set once per worker process by init_decomposition_worker
+decomposition_worker_state = {}
+
+def init_decomposition_worker(
+    shared_close_name,
+    close_shape,
+    dates,
+    backend
+):
+    """
+    """
+    # attaching to the parent's Close panel; the handle is kept so the buffer stays mapped
+    shared_close = shared_memory.SharedMemory(name=shared_close_name)
+    decomposition_worker_state.update({
+        'shared_close': shared_close,
+        'close': np.ndarray(close_shape, dtype=np.float64, buffer=shared_close.buf, order='F'),
+        'dates': dates,
+        'backend': backend
+    })
+
+def summarize_shared_columns(
+    columns
+):
+    """
+    """
+    close = decomposition_worker_state['close']
+    return [
+        dh__i.summarize_close(
+            decomposition_worker_state['dates'],
+            close[:, x],
+            decomposition_worker_state['backend']
+        )
+        for x in columns
+    ]
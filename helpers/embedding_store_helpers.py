@@ -0,0 +1,230 @@
+# ----- Imports -----
+import pandas as pd
+import numpy as np
+
+import os
+import shutil
+from dotenv import load_dotenv
+import json
+import threading
+
+from helpers.similarity_helpers import se__i
+
+# ----- StockEmbeddingStore -----
+
+load_dotenv()
+EMBEDDING_STORE_LOCATION = os.getenv('EMBEDDING_STORE_LOCATION', 'data/embedding_store')
+EMBEDDING_DIMENSIONS = int(os.getenv('EMBEDDING_DIMENSIONS', 64))
+EMBEDDING_SEED = int(os.getenv('EMBEDDING_SEED', 7))
+EMBEDDING_SESSIONS_TO_KEEP = int(os.getenv('EMBEDDING_SESSIONS_TO_KEEP', 3))
+
+class StockEmbeddingStore():
+    """
+    """
+
+    def __init__(
+        self,
+        store_location=EMBEDDING_STORE_LOCATION,
+        n_dimensions=EMBEDDING_DIMENSIONS,
+        seed=EMBEDDING_SEED,
+        volatility_window=20,
+        block_size=512
+    ):
+        """
+        """
+        # <store_location>/<session date>/embeddings.npy, a float32 (n_tickers, n_dimensions)
+        # array read as a memory map, next to tickers.json naming its rows
+        self.store_location = store_location
+        self.n_dimensions = n_dimensions
+        self.seed = seed
+        self.volatility_window = volatility_window
+        self.block_size = block_size
+        self.lock = threading.Lock()
+
+    def get_session_location(
+        self,
+        session
+    ):
+        """
+        """
+        return os.path.join(self.store_location, pd.Timestamp(session).date().isoformat())
+
+    def build_features(
+        self,
+        price_panel
+    ):
+        """
+        """
+        # per ticker, standardized daily returns, rolling volatility of those returns and
+        # log volume over the panel's dates, each block weighted equally
+        returns = price_panel.get_returns('Close')[1:]
+        volatilities = pd.DataFrame(returns).rolling(self.volatility_window, min_periods=2).std().to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_volumes = np.log1p(price_panel.get('Volume')[1:])
+
+        feature_blocks = [
+            se__i.normalize_features(se__i.standardize(x).T)
+            for x in [returns, volatilities, log_volumes]
+        ]
+        return np.hstack(feature_blocks)
+
+    def get_projection(
+        self,
+        n_features
+    ):
+        """
+        """
+        # seeded Gaussian random projection, so every block (and every rebuild with the
+        # same panel dates) lands in the same space
+        rng = np.random.default_rng(self.seed)
+        return rng.standard_normal((n_features, self.n_dimensions)) / np.sqrt(self.n_dimensions)
+
+    def build(
+        self,
+        session,
+        price_panel
+    ):
+        """
+        """
+        # written `block_size` tickers at a time straight into the memory-mapped file, so
+        # memory stays linear in the block rather than the universe
+        has_prices = ~np.isnan(price_panel.get('Close')).all(axis=0)
+        tickers = [x for x, y in zip(price_panel.tickers, has_prices) if y]
+
+        session_location = self.get_session_location(session)
+        tmp_location = f"{session_location}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(tmp_location, exist_ok=True)
+        embeddings = np.lib.format.open_memmap(
+            os.path.join(tmp_location, 'embeddings.npy'),
+            mode='w+',
+            dtype=np.float32,
+            shape=(len(tickers), self.n_dimensions)
+        )
+        projection = None
+        for start in range(0, len(tickers), self.block_size):
+            features = self.build_features(price_panel.select(tickers[start:start + self.block_size]))
+            projection = self.get_projection(features.shape[1]) if projection is None else projection
+            embeddings[start:start + self.block_size] = se__i.normalize_features(features @ projection)
+        embeddings.flush()
+        del embeddings
+
+        with open(os.path.join(tmp_location, 'tickers.json'), 'w') as file:
+            json.dump({'tickers': tickers, 'n_dimensions': self.n_dimensions, 'seed': self.seed}, file)
+
+        with self.lock:
+            shutil.rmtree(session_location, ignore_errors=True)
+            self.prune(sessions_to_keep=EMBEDDING_SESSIONS_TO_KEEP - 1)
+            os.replace(tmp_location, session_location)
+        return self.open(session)
+
+    def open(
+        self,
+        session
+    ):
+        """
+        """
+        # None when the session was never built
+        session_location = self.get_session_location(session)
+        if not os.path.exists(os.path.join(session_location, 'tickers.json')):
+            return None
+        return EmbeddingIndex(session_location)
+
+    def get_or_build(
+        self,
+        session,
+        price_panel_fn
+    ):
+        """
+        """
+        embedding_index = self.open(session)
+        return self.build(session, price_panel_fn()) if embedding_index is None else embedding_index
+
+    def prune(
+        self,
+        sessions_to_keep=EMBEDDING_SESSIONS_TO_KEEP
+    ):
+        """
+        """
+        sessions = sorted(x for x in os.listdir(self.store_location) if not x.endswith('.tmp'))
+        pruned_sessions = sessions[:max(len(sessions) - sessions_to_keep, 0)]
+        for session in pruned_sessions:
+            shutil.rmtree(os.path.join(self.store_location, session), ignore_errors=True)
+        return pruned_sessions
+
+
+class EmbeddingIndex():
+    """
+    """
+
+    def __init__(
+        self,
+        session_location
+    ):
+        """
+        """
+        # the same queries as NeighbourIndex, answered from the memory-mapped embeddings;
+        # pickles as its location only, so precomputed artifacts stay a few bytes
+        self.session_location = session_location
+        with open(os.path.join(session_location, 'tickers.json')) as file:
+            self.tickers = json.load(file)['tickers']
+        self.positions = {x: i for i, x in enumerate(self.tickers)}
+        self.embeddings = np.load(os.path.join(session_location, 'embeddings.npy'), mmap_mode='r')
+
+    def __getstate__(
+        self
+    ):
+        """
+        """
+        return {'session_location': self.session_location}
+
+    def __setstate__(
+        self,
+        state
+    ):
+        """
+        """
+        self.__init__(state['session_location'])
+
+    def __len__(
+        self
+    ):
+        """
+        """
+        return len(self.tickers)
+
+    def get_neighbours(
+        self,
+        ticker,
+        n_neighbours=3
+    ):
+        """
+        """
+        # most similar first, empty when the ticker is not indexed
+        position = self.positions.get(ticker)
+        if position is None or len(self.tickers) < 2:
+            return []
+        similarities = self.embeddings @ self.embeddings[position]
+        similarities[position] = -np.inf
+        n_neighbours = min(n_neighbours, len(self.tickers) - 1)
+        top_neighbours = np.argpartition(-similarities, n_neighbours - 1)[:n_neighbours]
+        top_neighbours = top_neighbours[np.argsort(-similarities[top_neighbours], kind='stable')]
+        return [self.tickers[x] for x in top_neighbours]
+
+    def get_average_similarity(
+        self,
+        tickers
+    ):
+        """
+        """
+        # the mean of cosines is the dot product with the mean of the unit embeddings;
+        # tickers that are not indexed are ignored
+        positions = [self.positions[x] for x in dict.fromkeys(tickers) if x in self.positions]
+        if len(positions) == 0:
+            similarities = np.zeros(len(self.tickers))
+        else:
+            similarities = self.embeddings @ self.embeddings[positions].mean(axis=0)
+        return pd.Series(
+            np.asarray(similarities, dtype=np.float64),
+            index=pd.Index(self.tickers, name='ticker'),
+            name='avg_similarity'
+        )
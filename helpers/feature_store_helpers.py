@@ -0,0 +1,229 @@
+# ----- Imports -----
+import pandas as pd
+import numpy as np
+
+import os
+from dotenv import load_dotenv
+import json
+import hashlib
+import threading
+
+# ----- FeatureStore -----
+
+load_dotenv()
+FEATURE_STORE_LOCATION = os.getenv('FEATURE_STORE_LOCATION', 'data/feature_store')
+
+# bumping FEATURE_VERSION (and describing the change here) is required whenever a
+# definition changes; a store written under other definitions refuses to open
+#   v2: RSI from the panel kernel, where a missing bar counts as no change
+#   v3: RSI dropped, see FEATURE_EXCLUSIONS
+FEATURE_VERSION = 3
+FEATURE_DEFINITIONS = {
+    'Close': "Close of each ticker's latest bar in the session's price panel",
+    'Volume': "Volume of each ticker's latest bar in the session's price panel",
+}
+# features the FY models take that are deliberately not stored, with the reason
+FEATURE_EXCLUSIONS = {
+    'RSI': "the session's price panel holds a single bar, so its RSI is always NaN; the quick FY model is scored with NaN RSI as before",
+}
+
+class FeatureStore():
+    """
+    """
+
+    def __init__(
+        self,
+        store_location=FEATURE_STORE_LOCATION,
+        version=FEATURE_VERSION,
+        definitions=FEATURE_DEFINITIONS,
+        exclusions=FEATURE_EXCLUSIONS
+    ):
+        """
+        """
+        # <store_location>/v<version>/manifest.json, plus one <session date>.npz per session
+        # holding a `tickers` array, a `dates` array and one float64 array per feature
+        self.version = version
+        self.definitions = definitions
+        self.exclusions = exclusions
+        self.feature_names = list(definitions.keys())
+        self.definitions_hash = hashlib.sha256(
+            json.dumps({'version': version, 'definitions': definitions, 'exclusions': exclusions}, sort_keys=True).encode()
+        ).hexdigest()
+        self.store_location = os.path.join(store_location, f"v{version}")
+        self.manifest_path = os.path.join(self.store_location, 'manifest.json')
+        self.lock = threading.Lock()
+        # the manifest is checked on first access rather than here, so a definitions mismatch
+        # only fails the code that reads features, not every module importing the store
+        self.is_manifest_checked = False
+
+    def check_manifest(
+        self
+    ):
+        """
+        """
+        if self.is_manifest_checked:
+            return
+        with self.lock:
+            if self.is_manifest_checked:
+                return
+            os.makedirs(self.store_location, exist_ok=True)
+            manifest = self.read_manifest()
+            if manifest is None:
+                self.write_manifest()
+            elif manifest['definitions_hash'] != self.definitions_hash:
+                raise ValueError(
+                    f"Feature definitions changed without a version bump: {self.manifest_path} was written "
+                    f"with {manifest['definitions']}, bump FEATURE_VERSION past {self.version}"
+                )
+            self.is_manifest_checked = True
+
+    def read_manifest(
+        self
+    ):
+        """
+        """
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path) as file:
+            return json.load(file)
+
+    def write_manifest(
+        self
+    ):
+        """
+        """
+        manifest = {
+            'version': self.version,
+            'definitions': self.definitions,
+            'exclusions': self.exclusions,
+            'definitions_hash': self.definitions_hash,
+            'feature_names': self.feature_names
+        }
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def get_session_path(
+        self,
+        session
+    ):
+        """
+        """
+        return os.path.join(self.store_location, f"{pd.Timestamp(session).date().isoformat()}.npz")
+
+    def get_sessions(
+        self
+    ):
+        """
+        """
+        self.check_manifest()
+        return sorted(
+            pd.Timestamp(x[:-len('.npz')]).date()
+            for x in os.listdir(self.store_location) if x.endswith('.npz')
+        )
+
+    def has(
+        self,
+        session
+    ):
+        """
+        """
+        self.check_manifest()
+        return os.path.exists(self.get_session_path(session))
+
+    def write(
+        self,
+        session,
+        feature_set
+    ):
+        """
+        """
+        self.check_manifest()
+        # feature_set: {'tickers', 'dates', 'feature_names', 'features' (n_tickers, n_features)}
+        if list(feature_set['feature_names']) != self.feature_names:
+            raise ValueError(f"Expected features {self.feature_names}, got {list(feature_set['feature_names'])}")
+
+        session_path = self.get_session_path(session)
+        tmp_path = f"{session_path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            tickers=np.array(feature_set['tickers'], dtype=str),
+            dates=np.asarray(feature_set['dates'], dtype='datetime64[ns]'),
+            **{x: np.ascontiguousarray(feature_set['features'][:, i]) for i, x in enumerate(self.feature_names)}
+        )
+        with self.lock:
+            os.replace(tmp_path, session_path)
+
+    def read(
+        self,
+        session,
+        feature_names=None
+    ):
+        """
+        """
+        self.check_manifest()
+        # the same layout `write` takes, None when the session was never materialized
+        session_path = self.get_session_path(session)
+        if not os.path.exists(session_path):
+            return None
+
+        feature_names = self.feature_names if feature_names is None else list(feature_names)
+        with np.load(session_path) as session_arrays:
+            features = np.empty((len(session_arrays['tickers']), len(feature_names)))
+            for i, feature_name in enumerate(feature_names):
+                features[:, i] = session_arrays[feature_name]
+            return {
+                'tickers': session_arrays['tickers'].tolist(),
+                'dates': pd.DatetimeIndex(session_arrays['dates']),
+                'feature_names': feature_names,
+                'features': features
+            }
+
+    def get_or_build(
+        self,
+        session,
+        build_fn
+    ):
+        """
+        """
+        feature_set = self.read(session)
+        if feature_set is None:
+            feature_set = build_fn()
+            self.write(session, feature_set)
+        return feature_set
+
+    def read_frame(
+        self,
+        start_date=None,
+        end_date=None
+    ):
+        """
+        """
+        # long Date/ticker/features frame over [start_date, end_date] for training and backtests
+        session_dfs = []
+        for session in self.get_sessions():
+            if (start_date is not None and session < pd.Timestamp(start_date).date()) or \
+               (end_date is not None and session > pd.Timestamp(end_date).date()):
+                continue
+            feature_set = self.read(session)
+            session_df = pd.DataFrame(feature_set['features'], columns=feature_set['feature_names'])
+            session_df.insert(0, 'ticker', feature_set['tickers'])
+            session_df.insert(0, 'Date', feature_set['dates'])
+            session_df.insert(0, 'session', pd.Timestamp(session))
+            session_dfs.append(session_df)
+
+        if len(session_dfs) == 0:
+            return pd.DataFrame(columns=['session', 'Date', 'ticker'] + self.feature_names)
+        return pd.concat(session_dfs, ignore_index=True)
+
+
+if __name__ == '__main__':
+    # python -m helpers.feature_store_helpers [<start_date> [<end_date>]]
+    import sys
+
+    fs__i = FeatureStore()
+    feature_df = fs__i.read_frame(*sys.argv[1:3])
+    with pd.option_context('display.max_rows', 50, 'display.width', 200):
+        print(feature_df)
+    print(f"{fs__i.store_location}: {len(fs__i.get_sessions())} sessions, definitions {fs__i.definitions_hash[:12]}")
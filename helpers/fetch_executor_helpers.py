@@ -0,0 +1,126 @@
+# ----- Imports -----
+import os
+from dotenv import load_dotenv
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ----- FetchExecutor -----
+
+load_dotenv()
+FETCH_MAX_WORKERS = int(os.getenv('FETCH_MAX_WORKERS', 8))
+FETCH_REQUESTS_PER_SECOND = float(os.getenv('FETCH_REQUESTS_PER_SECOND', 20))
+FETCH_BURST = int(os.getenv('FETCH_BURST', 50))
+
+class RateLimiter():
+    """
+    """
+
+    def __init__(
+        self,
+        requests_per_second=FETCH_REQUESTS_PER_SECOND,
+        burst=FETCH_BURST
+    ):
+        """
+        """
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(
+        self,
+        n_requests=1
+    ):
+        """
+        """
+        # token bucket: blocks until `n_requests` fit in the global budget
+        n_requests = min(n_requests, self.burst)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.requests_per_second)
+                self.last_refill = now
+                if self.tokens >= n_requests:
+                    self.tokens -= n_requests
+                    return
+                wait_time = (n_requests - self.tokens) / self.requests_per_second
+            time.sleep(wait_time)
+
+
+class FetchExecutor():
+    """
+    """
+
+    def __init__(
+        self,
+        max_workers=FETCH_MAX_WORKERS,
+        rate_limiter=None
+    ):
+        """
+        """
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ystock-fetch')
+        self.rate_limiter = RateLimiter() if rate_limiter is None else rate_limiter
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.n_submitted = 0
+        self.n_deduplicated = 0
+
+    def submit(
+        self,
+        key,
+        fn,
+        *args,
+        n_requests=1,
+        **kwargs
+    ):
+        """
+        """
+        # single-flight: identical requests share the future of the call already running
+        with self.lock:
+            self.n_submitted += 1
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.n_deduplicated += 1
+                return future
+
+            future = self.pool.submit(self.run, fn, n_requests, args, kwargs)
+            self.in_flight[key] = future
+        future.add_done_callback(lambda done_future: self.release(key, done_future))
+        return future
+
+    def run(
+        self,
+        fn,
+        n_requests,
+        args,
+        kwargs
+    ):
+        """
+        """
+        self.rate_limiter.acquire(n_requests)
+        return fn(*args, **kwargs)
+
+    def release(
+        self,
+        key,
+        future
+    ):
+        """
+        """
+        with self.lock:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+
+    def stats(
+        self
+    ):
+        """
+        """
+        with self.lock:
+            return {
+                'in_flight': len(self.in_flight),
+                'submitted': self.n_submitted,
+                'deduplicated': self.n_deduplicated
+            }
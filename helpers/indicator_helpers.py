@@ -0,0 +1,515 @@
+# ----- Imports -----
+import pandas as pd
+import numpy as np
+from scipy.signal import lfilter
+
+import threading
+
+from helpers.cache_helpers import LRUCache
+
+# ----- IndicatorHelpers -----
+
+# indicator -> output columns, all next to a Date column with one row per bar
+INDICATOR_COLUMNS = {
+    'moving_average': ['value'],
+    'macd': ['macd_line', 'macd_signal', 'macd_hist'],
+    'rsi': ['RSI'],
+    'bollinger_bands': ['ma_line', 'upper_band', 'lower_band'],
+}
+
+# the technical graphs' slider defaults, computed as soon as a ticker's engine is built
+DEFAULT_INDICATOR_PARAMETERS = [
+    ('moving_average', (7,)),
+    ('moving_average', (100,)),
+    ('macd', (9, 12, 26)),
+    ('rsi', (14,)),
+    ('bollinger_bands', (20, 2)),
+]
+
+class IndicatorHelpers():
+    """
+    """
+
+    def __init__(self):
+        """
+        """
+        # ticker -> IndicatorEngine, kept for the process so new bars are only appended
+        self.engines = {}
+        self.lock = threading.Lock()
+        # (ticker, first date, last date, indicator, parameters) -> indicator frame; a new bar
+        # changes the key, so stale frames are never served and just age out
+        self.indicator_cache = LRUCache(max_entries=2048, max_bytes=128 * 1024 * 1024)
+
+    def get_indicator_engine(
+        self,
+        ticker,
+        dates,
+        values
+    ):
+        """
+        """
+        # the ticker's engine, extended with any bars after its last one; a history that no
+        # longer lines up with the engine's (e.g. a different start date) rebuilds it
+        dates = pd.DatetimeIndex(dates)
+        values = np.asarray(values, dtype=np.float64)
+        date_order = np.argsort(dates, kind='stable')
+        dates, values = dates[date_order], values[date_order]
+        is_valid = ~np.isnan(values)
+        dates, values = dates[is_valid], values[is_valid]
+
+        with self.lock:
+            engine = self.engines.get(ticker)
+            n_bars = 0 if engine is None else len(engine)
+            is_updated = True
+            if (
+                (n_bars == 0) or (len(dates) < n_bars) or
+                (engine.get_dates()[0] != dates[0]) or
+                (engine.get_dates()[-1] != dates[n_bars - 1])
+            ):
+                engine = IndicatorEngine(dates, values)
+                self.engines[ticker] = engine
+            elif len(dates) > n_bars:
+                engine.extend(dates[n_bars:], values[n_bars:])
+            else:
+                is_updated = False
+
+        if is_updated and len(engine) > 0:
+            self.warm_indicator_cache(ticker, engine)
+        return engine
+
+    def calculate_indicator(
+        self,
+        engine,
+        indicator,
+        parameters
+    ):
+        """
+        """
+        if indicator == 'moving_average':
+            indicator_values = [engine.get_moving_average(*parameters)]
+        elif indicator == 'macd':
+            indicator_values = engine.get_macd(*parameters)
+        elif indicator == 'rsi':
+            indicator_values = [engine.get_rsi(*parameters)]
+        elif indicator == 'bollinger_bands':
+            indicator_values = engine.get_bollinger_bands(*parameters)
+        else:
+            raise ValueError(f"Unknown indicator '{indicator}', expected one of {list(INDICATOR_COLUMNS)}")
+
+        return pd.DataFrame({
+            'Date': engine.get_dates(),
+            **dict(zip(INDICATOR_COLUMNS[indicator], indicator_values))
+        })
+
+    def get_indicator(
+        self,
+        ticker,
+        indicator,
+        parameters
+    ):
+        """
+        """
+        # e.g. get_indicator('AAPL', 'macd', (9, 12, 26)) for the ticker's current engine;
+        # callers must not mutate the returned frame, it is shared with the cache
+        engine = self.engines[ticker]
+        engine_dates = engine.get_dates()
+        key = (ticker, engine_dates[0], engine_dates[-1], indicator, tuple(parameters))
+        indicator_df = self.indicator_cache.get(key)
+        if indicator_df is None:
+            indicator_df = self.calculate_indicator(engine, indicator, parameters)
+            self.indicator_cache.set(key, indicator_df)
+        return indicator_df
+
+    def warm_indicator_cache(
+        self,
+        ticker,
+        engine,
+        indicator_parameters=DEFAULT_INDICATOR_PARAMETERS
+    ):
+        """
+        """
+        engine_dates = engine.get_dates()
+        for indicator, parameters in indicator_parameters:
+            key = (ticker, engine_dates[0], engine_dates[-1], indicator, tuple(parameters))
+            self.indicator_cache.set(key, self.calculate_indicator(engine, indicator, parameters))
+
+    def calculate_panel_rsi(
+        self,
+        values,
+        period=14,
+        method='simple',
+        out=None
+    ):
+        """
+        """
+        # RSI of every column of a (n_dates, n_tickers) close panel (or a single series);
+        # `values` is never written to and the result goes into `out` when given
+        #   'simple': rolling means of gains and losses with min_periods=1, as calculate_rsi
+        #   'wilder': Wilder's smoothing, seeded with the simple mean of the first `period` changes
+        values = np.asarray(values, dtype=np.float64)
+        out = np.empty(values.shape) if out is None else out
+        is_series = values.ndim == 1
+        values = values.reshape(-1, 1) if is_series else values
+        rsi = out.reshape(-1, 1) if is_series else out
+        if method not in ['simple', 'wilder']:
+            raise ValueError(f"Unknown RSI method '{method}', expected 'simple' or 'wilder'")
+
+        # gains are accumulated in `out` and losses in the one scratch buffer, so nothing
+        # else the size of the panel is allocated
+        losses = np.empty(values.shape)
+        self.calculate_price_moves(values, rsi, losses)
+        if method == 'simple':
+            self.calculate_simple_rsi(period, rsi, losses)
+        else:
+            self.calculate_wilder_rsi(period, rsi, losses)
+        return out
+
+    def calculate_price_moves(
+        self,
+        values,
+        gains,
+        losses
+    ):
+        """
+        """
+        # bar-to-bar gains and losses (both >= 0) into the two buffers; the first row has no
+        # change and missing (NaN) changes count as no change, as fmax / fmin drop NaNs
+        losses[:1] = 0
+        np.subtract(values[1:], values[:-1], out=losses[1:])
+        np.fmax(losses, 0, out=gains)
+        np.fmin(losses, 0, out=losses)
+        np.negative(losses, out=losses)
+
+    def calculate_window_sums(
+        self,
+        moves,
+        period
+    ):
+        """
+        """
+        # in place: moves[t] becomes the sum of moves[t - period + 1:t + 1] (fewer at the start,
+        # as min_periods=1), from the running sum less the running sum `period` rows back;
+        # windows without any move stay exactly 0, since adding zeros leaves a float unchanged
+        np.cumsum(moves, axis=0, out=moves)
+        # bottom up in blocks of `period` rows, so every block reads rows not yet rewritten
+        for end in range(moves.shape[0], period, -period):
+            start = max(end - period, period)
+            np.subtract(moves[start:end], moves[start - period:end - period], out=moves[start:end])
+
+    def calculate_simple_rsi(
+        self,
+        period,
+        gains,
+        losses
+    ):
+        """
+        """
+        # the window counts cancel in avg_gain / avg_loss, so window sums are enough
+        self.calculate_window_sums(gains, period)
+        self.calculate_window_sums(losses, period)
+        self.convert_rs_to_rsi(gains, losses)
+
+    def calculate_wilder_rsi(
+        self,
+        period,
+        gains,
+        losses,
+        block_size=256
+    ):
+        """
+        """
+        n_dates = gains.shape[0]
+        if n_dates <= period:
+            gains[:] = np.nan
+            return
+
+        smoothing = 1 / period
+        for moves in [gains, losses]:
+            # avg[t] = avg[t - 1] * (1 - 1/period) + move[t] / period, from the seed at `period`;
+            # lfilter runs over `block_size` rows at a time and its output is copied back in
+            # place, so its temporaries stay the size of a block
+            moves[period] = moves[1:period + 1].mean(axis=0)
+            filter_state = (moves[period] * (1 - smoothing))[np.newaxis]
+            for start in range(period + 1, n_dates, block_size):
+                moves[start:start + block_size], filter_state = lfilter(
+                    [smoothing], [1, smoothing - 1], moves[start:start + block_size], axis=0,
+                    zi=filter_state
+                )
+        self.convert_rs_to_rsi(gains[period:], losses[period:])
+        gains[:period] = np.nan
+
+    def convert_rs_to_rsi(
+        self,
+        gains,
+        losses
+    ):
+        """
+        """
+        # in place on `gains`: RSI = 100 - 100 / (1 + gains / losses)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.divide(gains, losses, out=gains)
+            np.add(gains, 1, out=gains)
+            np.divide(100, gains, out=gains)
+            np.subtract(100, gains, out=gains)
+        return gains
+
+
+class IndicatorEngine():
+    """
+    """
+    def __init__(
+        self,
+        dates,
+        values,
+        capacity=256
+    ):
+        """
+        """
+        # one ticker's closes with running state, all in buffers that double when full:
+        #   prefix sums of values, (value - offset)^2, gains and losses, so any MA, Bollinger
+        #   or RSI window is two lookups whatever the period
+        #   EMA series per span (and MACD signal series per parameter set) computed on first
+        #   request and then carried forward bar by bar
+        self.n_bars = 0
+        self.capacity = 0
+        self.offset = None
+        self.dates = np.empty(0, dtype='datetime64[ns]')
+        self.values = np.empty(0)
+        self.value_sums = np.zeros(1)
+        self.squared_sums = np.zeros(1)
+        self.gain_sums = np.zeros(1)
+        self.loss_sums = np.zeros(1)
+        self.emas = {}
+        self.macd_signals = {}
+        self.lock = threading.Lock()
+        self.reserve(max(capacity, len(values)))
+        self.extend(dates, values)
+
+    def __len__(
+        self
+    ):
+        """
+        """
+        return self.n_bars
+
+    def reserve(
+        self,
+        capacity
+    ):
+        """
+        """
+        if capacity <= self.capacity:
+            return
+
+        def grow(buffer, size):
+            grown_buffer = np.empty(size, dtype=buffer.dtype)
+            grown_buffer[:len(buffer)] = buffer
+            return grown_buffer
+
+        self.dates = grow(self.dates, capacity)
+        self.values = grow(self.values, capacity)
+        self.value_sums = grow(self.value_sums, capacity + 1)
+        self.squared_sums = grow(self.squared_sums, capacity + 1)
+        self.gain_sums = grow(self.gain_sums, capacity + 1)
+        self.loss_sums = grow(self.loss_sums, capacity + 1)
+        self.emas = {x: grow(y, capacity) for x, y in self.emas.items()}
+        self.macd_signals = {x: grow(y, capacity) for x, y in self.macd_signals.items()}
+        self.capacity = capacity
+
+    def append(
+        self,
+        date,
+        value
+    ):
+        """
+        """
+        self.extend([date], [value])
+
+    def extend(
+        self,
+        dates,
+        values
+    ):
+        """
+        """
+        # O(1) per new bar for every tracked series; NaN closes are expected to be dropped first
+        values = np.asarray(values, dtype=np.float64)
+        n_new = len(values)
+        if n_new == 0:
+            return
+
+        with self.lock:
+            start, end = self.n_bars, self.n_bars + n_new
+            if end > self.capacity:
+                self.reserve(max(end, 2 * self.capacity))
+            if self.offset is None:
+                self.offset = values[0]
+
+            self.dates[start:end] = pd.DatetimeIndex(dates).to_numpy()
+            self.values[start:end] = values
+            price_changes = np.diff(values, prepend=values[0] if start == 0 else self.values[start - 1])
+            np.cumsum(values, out=self.value_sums[start + 1:end + 1])
+            np.cumsum((values - self.offset) ** 2, out=self.squared_sums[start + 1:end + 1])
+            np.cumsum(np.maximum(price_changes, 0), out=self.gain_sums[start + 1:end + 1])
+            np.cumsum(np.maximum(-price_changes, 0), out=self.loss_sums[start + 1:end + 1])
+            for prefix_sums in [self.value_sums, self.squared_sums, self.gain_sums, self.loss_sums]:
+                prefix_sums[start + 1:end + 1] += prefix_sums[start]
+
+            for span, ema in self.emas.items():
+                self.update_ema(ema, self.values, span, start, end)
+            for (signal_period, fast_period, slow_period), macd_signal in self.macd_signals.items():
+                macd_line = self.emas[fast_period][:end] - self.emas[slow_period][:end]
+                self.update_ema(macd_signal, macd_line, signal_period, start, end)
+            self.n_bars = end
+
+    def get_ema_smoothing(
+        self,
+        span
+    ):
+        """
+        """
+        # pandas' ewm(span=span) smoothing factor
+        return 2 / (span + 1)
+
+    def update_ema(
+        self,
+        ema,
+        values,
+        span,
+        start,
+        end
+    ):
+        """
+        """
+        # ewm(span, adjust=False): ema[0] = values[0], ema[t] = a * values[t] + (1 - a) * ema[t - 1]
+        smoothing = self.get_ema_smoothing(span)
+        if start == 0:
+            ema[0] = values[0]
+            start = 1
+        if end > start:
+            ema[start:end], _ = lfilter(
+                [smoothing], [1, smoothing - 1], values[start:end],
+                zi=[(1 - smoothing) * ema[start - 1]]
+            )
+
+    def get_dates(
+        self
+    ):
+        """
+        """
+        return pd.DatetimeIndex(self.dates[:self.n_bars], name='Date')
+
+    def get_values(
+        self
+    ):
+        """
+        """
+        return self.values[:self.n_bars]
+
+    def get_window_sums(
+        self,
+        prefix_sums,
+        period,
+        min_periods=None
+    ):
+        """
+        """
+        # sums over the `period` bars ending at each bar; NaN before `min_periods` bars
+        min_periods = period if min_periods is None else min_periods
+        window_ends = np.arange(1, self.n_bars + 1)
+        window_starts = np.maximum(window_ends - period, 0)
+        window_sums = prefix_sums[window_ends] - prefix_sums[window_starts]
+        window_sums[:min_periods - 1] = np.nan
+        return window_sums
+
+    def get_moving_average(
+        self,
+        period
+    ):
+        """
+        """
+        # as Series.rolling(window=period).mean()
+        return self.get_window_sums(self.value_sums, period) / period
+
+    def get_moving_std(
+        self,
+        period
+    ):
+        """
+        """
+        # as Series.rolling(window=period).std(), i.e. ddof=1; sums are taken around the first
+        # value to keep the variance from cancelling out
+        shifted_sums = self.get_window_sums(self.value_sums, period) - period * self.offset
+        squared_sums = self.get_window_sums(self.squared_sums, period)
+        variances = (squared_sums - shifted_sums ** 2 / period) / (period - 1)
+
+        # a flat window leaves rounding noise instead of an exact 0, which sqrt blows up; like
+        # pandas, windows without a single price change get a variance of 0
+        price_moves = self.get_window_sums(self.gain_sums, period - 1) + self.get_window_sums(self.loss_sums, period - 1)
+        variances[price_moves == 0] = 0
+        np.maximum(variances, 0, out=variances)
+        return np.sqrt(variances)
+
+    def get_bollinger_bands(
+        self,
+        period,
+        number_of_std_devs=2
+    ):
+        """
+        """
+        ma_line = self.get_moving_average(period)
+        std_devs = self.get_moving_std(period)
+        return (
+            ma_line,
+            ma_line + (number_of_std_devs * std_devs),
+            ma_line - (number_of_std_devs * std_devs)
+        )
+
+    def get_ema(
+        self,
+        span
+    ):
+        """
+        """
+        with self.lock:
+            if span not in self.emas:
+                ema = np.empty(self.capacity)
+                if self.n_bars > 0:
+                    self.update_ema(ema, self.values, span, 0, self.n_bars)
+                self.emas[span] = ema
+            return self.emas[span][:self.n_bars]
+
+    def get_macd(
+        self,
+        signal_period,
+        fast_period,
+        slow_period
+    ):
+        """
+        """
+        # (macd_line, macd_signal, macd_hist), as calculate_macd
+        macd_line = self.get_ema(fast_period) - self.get_ema(slow_period)
+        parameters = (signal_period, fast_period, slow_period)
+        with self.lock:
+            if parameters not in self.macd_signals:
+                macd_signal = np.empty(self.capacity)
+                if self.n_bars > 0:
+                    self.update_ema(macd_signal, macd_line, signal_period, 0, self.n_bars)
+                self.macd_signals[parameters] = macd_signal
+            macd_signal = self.macd_signals[parameters][:self.n_bars]
+        return macd_line, macd_signal, macd_line - macd_signal
+
+    def get_rsi(
+        self,
+        period=14
+    ):
+        """
+        """
+        # as calculate_rsi (simple rolling means, min_periods=1)
+        gain_sums = self.get_window_sums(self.gain_sums, period, min_periods=1)
+        loss_sums = self.get_window_sums(self.loss_sums, period, min_periods=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return 100 - (100 / (1 + gain_sums / loss_sums))
+
+
+ih__i = IndicatorHelpers()
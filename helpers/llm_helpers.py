@@ -4,22 +4,10 @@ import time
 import requests
 from bs4 import BeautifulSoup
 import html
-
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from splinter import Browser
-
-import tensorflow
-from transformers import pipeline, TFAutoModelForSeq2SeqLM, AutoTokenizer
+import threading
 
 import re
 
-import litellm
-from langchain.llms import Ollama
-from langchain.callbacks.manager import CallbackManager
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler    
 from langchain import PromptTemplate, LLMChain
 from langchain.chains import LLMChain
 from langchain.memory import ConversationBufferMemory
@@ -40,26 +28,81 @@ from scipy.spatial.distance import cdist
 from data.configs import STOCK_TICKERS_DICT
 
 # ----- LLMHelpers -----
-class LLMHelpers():
+class ModelHolder():
     """
     """
-    ignored_article_headlines = [
-        # "google news",
-        "verfiy you are a human",
-        "we've detected unusual activity from your computer network",
-    ]
-    llm = Ollama(
+
+    def __init__(
+        self
+    ):
+        """
+        """
+        # name -> loaded model, shared by every LLMHelpers instance in the process
+        self.models = {}
+        self.lock = threading.Lock()
+        self.model_locks = {}
+
+    def get(
+        self,
+        name,
+        loader
+    ):
+        """
+        """
+        model = self.models.get(name)
+        if model is not None:
+            return model
+
+        with self.lock:
+            model_lock = self.model_locks.setdefault(name, threading.Lock())
+        # loading outside of the holder-wide lock so one slow model does not block the others
+        with model_lock:
+            if name not in self.models:
+                self.models[name] = loader()
+        return self.models[name]
+
+
+def load_ollama_llm():
+    """
+    """
+    from langchain.llms import Ollama
+    from langchain.callbacks.manager import CallbackManager
+    from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
+
+    return Ollama(
         model='mistral',
         callback_manager = CallbackManager([StreamingStdOutCallbackHandler()]),
         temperature=0.9
     )
-    summarization_model_name = "t5-small"
-    summarization_pipeline = pipeline(
+
+def load_summarization_pipeline(
+    summarization_model_name="t5-small"
+):
+    """
+    """
+    # tensorflow and the t5 weights cost seconds and hundreds of MB, so only the
+    # news summaries pay for them
+    import tensorflow
+    from transformers import pipeline, TFAutoModelForSeq2SeqLM, AutoTokenizer
+
+    return pipeline(
         "summarization",
         model=TFAutoModelForSeq2SeqLM.from_pretrained(summarization_model_name, from_pt=True),
         tokenizer=AutoTokenizer.from_pretrained(summarization_model_name),
         framework='tf'
     )
+
+mh__i = ModelHolder()
+
+class LLMHelpers():
+    """
+    """
+    ignored_article_headlines = [
+        # "google news",
+        "verfiy you are a human",
+        "we've detected unusual activity from your computer network",
+    ]
+    summarization_model_name = "t5-small"
     
     ama_prompt_template = PromptTemplate(
         input_variables=['history', 'input'],
@@ -128,6 +171,25 @@ class LLMHelpers():
         """
         pass
     
+    @property
+    def llm(
+        self
+    ):
+        """
+        """
+        return mh__i.get('ollama', load_ollama_llm)
+    
+    @property
+    def summarization_pipeline(
+        self
+    ):
+        """
+        """
+        return mh__i.get(
+            f"summarization:{self.summarization_model_name}",
+            lambda: load_summarization_pipeline(self.summarization_model_name)
+        )
+    
     def generate_ama_classification(
         self,
         input_message,
@@ -204,6 +266,11 @@ class LLMHelpers():
     ):
         """
         """
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+        from webdriver_manager.chrome import ChromeDriverManager
+        from splinter import Browser
+        
         chrome_options = Options()
         chrome_options.add_argument("--headless") 
         chrome_options.add_argument("--no-sandbox")
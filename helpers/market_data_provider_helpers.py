@@ -0,0 +1,256 @@
+# ----- Imports -----
+import pandas as pd
+
+import os
+from dotenv import load_dotenv
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import yfinance as yf
+from yfinance.exceptions import YFChartError, YFInvalidPeriodError, YFTickerMissingError
+
+from helpers.price_store_helpers import OHLCV_COLUMNS
+
+# ----- MarketDataProviders -----
+
+load_dotenv()
+MARKET_DATA_PROVIDER = os.getenv('MARKET_DATA_PROVIDER', 'yfinance')
+MARKET_DATA_REPLAY_LOCATION = os.getenv('MARKET_DATA_REPLAY_LOCATION', 'data/replay')
+MARKET_DATA_REPLAY_LATENCY = float(os.getenv('MARKET_DATA_REPLAY_LATENCY', 0))
+# concurrent yfinance requests across every download, as yf.download's default threads
+YFINANCE_MAX_THREADS = int(os.getenv('YFINANCE_MAX_THREADS', 2 * (os.cpu_count() or 1)))
+# a symbol that always has bars, requested to tell an outage from symbols without data
+YFINANCE_PROBE_TICKER = os.getenv('YFINANCE_PROBE_TICKER', 'SPY')
+# yfinance's errors for a symbol without data (delisted, mistyped, no bars in the range)
+YFINANCE_MISSING_DATA_ERRORS = (YFTickerMissingError, YFChartError, YFInvalidPeriodError)
+
+class MarketDataUnavailableError(OSError):
+    """
+    """
+    # a transport failure yfinance reported as missing data; an OSError, so it is retried
+    pass
+
+
+class MarketDataProvider():
+    """
+    """
+    name = None
+
+    def download(
+        self,
+        tickers,
+        start_date,
+        end_date
+    ):
+        """
+        """
+        # long frame indexed by Date with OHLCV + `ticker` columns, end date exclusive
+        raise NotImplementedError
+
+    def get_empty_frame(
+        self
+    ):
+        """
+        """
+        return pd.DataFrame(
+            columns=OHLCV_COLUMNS + ['ticker'],
+            index=pd.DatetimeIndex([], name='Date')
+        )
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    """
+    name = 'yfinance'
+
+    def __init__(
+        self,
+        max_threads=YFINANCE_MAX_THREADS,
+        probe_ticker=YFINANCE_PROBE_TICKER
+    ):
+        """
+        """
+        # yf.download collects its results in module-global state (yfinance.shared), so two
+        # concurrent calls mix up each other's frames; every ticker is fetched with
+        # Ticker.history instead, which is what yf.download runs per ticker, on a pool
+        # shared by all downloads, so requests from different FetchExecutor workers overlap
+        # (the FetchExecutor's rate limiter still caps how fast they are sent)
+        self.pool = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='yfinance')
+        self.probe_ticker = probe_ticker
+
+    def download_ticker(
+        self,
+        ticker,
+        start_date,
+        end_date
+    ):
+        """
+        """
+        # as yf.download's defaults; None for a symbol without data, transport errors
+        # (OSError, requests' errors included) propagate so callers can retry them
+        try:
+            return yf.Ticker(ticker).history(
+                start=start_date,
+                end=end_date,
+                auto_adjust=False,
+                actions=False,
+                raise_errors=True
+            )
+        except YFINANCE_MISSING_DATA_ERRORS:
+            return None
+
+    def is_reachable(
+        self
+    ):
+        """
+        """
+        # yfinance swallows the transport error of its timezone lookup and reports the
+        # symbol as missing (YFTzMissingError), so an outage looks like missing data
+        try:
+            return not yf.Ticker(self.probe_ticker).history(period='5d', raise_errors=True).empty
+        except (OSError,) + YFINANCE_MISSING_DATA_ERRORS:
+            return False
+
+    def download(
+        self,
+        tickers,
+        start_date,
+        end_date
+    ):
+        """
+        """
+        ticker_futures = [self.pool.submit(self.download_ticker, x, start_date, end_date) for x in tickers]
+        ticker_dfs = [x.result() for x in ticker_futures]
+
+        # when no symbol came back with data, it is only believed once the probe symbol does
+        if len(tickers) > 0 and all(x is None for x in ticker_dfs) and not self.is_reachable():
+            raise MarketDataUnavailableError(f"yfinance is unreachable, no data for {list(tickers)}")
+
+        stocks_df = []
+        for ticker, ticker_df in zip(tickers, ticker_dfs):
+            if ticker_df is None or ticker_df.empty:
+                continue
+            ticker_df = ticker_df.reindex(columns=OHLCV_COLUMNS).dropna(how='all')
+            # daily bars are stamped at midnight exchange time, kept as naive dates
+            ticker_df.index = pd.DatetimeIndex(ticker_df.index).tz_localize(None).rename('Date')
+            ticker_df['ticker'] = ticker
+            stocks_df.append(ticker_df)
+
+        if len(stocks_df) == 0:
+            return self.get_empty_frame()
+        return pd.concat(stocks_df)
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    """
+    name = 'replay'
+
+    def __init__(
+        self,
+        fixtures_location=MARKET_DATA_REPLAY_LOCATION,
+        latency=MARKET_DATA_REPLAY_LATENCY
+    ):
+        """
+        """
+        # one `<ticker>.csv` fixture per ticker, with a Date column and the OHLCV columns
+        self.fixtures_location = fixtures_location
+        self.latency = latency
+        self.fixtures = {}
+        self.lock = threading.Lock()
+
+    def get_fixture_path(
+        self,
+        ticker
+    ):
+        """
+        """
+        return os.path.join(self.fixtures_location, f"{ticker}.csv")
+
+    def load_fixture(
+        self,
+        ticker
+    ):
+        """
+        """
+        with self.lock:
+            if ticker not in self.fixtures:
+                fixture_path = self.get_fixture_path(ticker)
+                if os.path.exists(fixture_path):
+                    fixture_df = pd.read_csv(fixture_path, parse_dates=['Date'], index_col='Date')
+                    fixture_df = fixture_df.reindex(columns=OHLCV_COLUMNS).sort_index()
+                else:
+                    fixture_df = None
+                self.fixtures[ticker] = fixture_df
+            return self.fixtures[ticker]
+
+    def download(
+        self,
+        tickers,
+        start_date,
+        end_date
+    ):
+        """
+        """
+        # simulating the round trip of the real provider
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        stocks_df = []
+        for ticker in tickers:
+            fixture_df = self.load_fixture(ticker)
+            if fixture_df is None:
+                continue
+            ticker_df = fixture_df[(fixture_df.index >= start_date) & (fixture_df.index < end_date)].copy()
+            ticker_df['ticker'] = ticker
+            stocks_df.append(ticker_df)
+
+        if len(stocks_df) == 0:
+            return self.get_empty_frame()
+        return pd.concat(stocks_df)
+
+    def record(
+        self,
+        df
+    ):
+        """
+        """
+        # writing a long frame (e.g. from YFinanceProvider) into per-ticker fixtures
+        os.makedirs(self.fixtures_location, exist_ok=True)
+        for ticker, ticker_df in df.groupby('ticker'):
+            ticker_df = ticker_df[OHLCV_COLUMNS]
+            existing_df = self.load_fixture(ticker)
+            if existing_df is not None:
+                ticker_df = pd.concat([existing_df, ticker_df])
+                ticker_df = ticker_df[~ticker_df.index.duplicated(keep='last')].sort_index()
+            ticker_df.rename_axis('Date').to_csv(self.get_fixture_path(ticker))
+            with self.lock:
+                self.fixtures[ticker] = ticker_df
+
+
+def get_market_data_provider(
+    provider_name=MARKET_DATA_PROVIDER
+):
+    """
+    """
+    providers = {
+        YFinanceProvider.name: YFinanceProvider,
+        ReplayProvider.name: ReplayProvider,
+    }
+    if provider_name not in providers:
+        raise ValueError(f"Unknown MARKET_DATA_PROVIDER '{provider_name}', expected one of {list(providers)}")
+    return providers[provider_name]()
+
+
+if __name__ == '__main__':
+    # python -m helpers.market_data_provider_helpers <start_date> <end_date>
+    # records replay fixtures for the whole ticker universe from yfinance
+    import sys
+    from data.configs import STOCK_TICKERS_DICT
+
+    start_date, end_date = sys.argv[1], sys.argv[2]
+    recorded_df = YFinanceProvider().download(list(STOCK_TICKERS_DICT.keys()), start_date, end_date)
+    ReplayProvider().record(recorded_df)
+    print(f"Recorded {recorded_df['ticker'].nunique()} tickers into {MARKET_DATA_REPLAY_LOCATION}")
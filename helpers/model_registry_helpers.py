@@ -0,0 +1,156 @@
+# ----- Imports -----
+import pandas as pd
+import joblib
+import psutil
+
+import os
+from dotenv import load_dotenv
+import time
+import hashlib
+import threading
+import traceback
+
+# ----- ModelRegistry -----
+
+load_dotenv()
+# 'r' memory-maps the models' numpy arrays so worker processes share the same pages;
+# an empty value loads them into each process instead
+MODEL_MMAP_MODE = os.getenv('MODEL_MMAP_MODE', 'r') or None
+
+class ModelRegistry():
+    """
+    """
+
+    def __init__(
+        self,
+        mmap_mode=MODEL_MMAP_MODE
+    ):
+        """
+        """
+        # path -> entry with the model, the file signature it was loaded from and load metrics
+        self.mmap_mode = mmap_mode
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.model_locks = {}
+
+    def get_file_signature(
+        self,
+        model_path
+    ):
+        """
+        """
+        file_stat = os.stat(model_path)
+        return (file_stat.st_mtime_ns, file_stat.st_size)
+
+    def get_file_hash(
+        self,
+        model_path
+    ):
+        """
+        """
+        file_hash = hashlib.sha256()
+        with open(model_path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
+    def load(
+        self,
+        model_path
+    ):
+        """
+        """
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
+        load_start = time.perf_counter()
+        model = joblib.load(model_path, mmap_mode=self.mmap_mode)
+        return {
+            'model': model,
+            'signature': self.get_file_signature(model_path),
+            'file_hash': self.get_file_hash(model_path),
+            'loaded_at': pd.Timestamp.now(),
+            'load_seconds': time.perf_counter() - load_start,
+            'file_bytes': os.path.getsize(model_path),
+            'rss_delta_bytes': process.memory_info().rss - rss_before,
+            'n_loads': 1
+        }
+
+    def get(
+        self,
+        model_path
+    ):
+        """
+        """
+        # a stat per call; the model is only (re)loaded when the file changed on disk
+        signature = self.get_file_signature(model_path)
+        entry = self.entries.get(model_path)
+        if entry is not None and entry['signature'] == signature:
+            return entry['model']
+
+        with self.lock:
+            model_lock = self.model_locks.setdefault(model_path, threading.Lock())
+        with model_lock:
+            entry = self.entries.get(model_path)
+            if entry is not None and entry['signature'] == self.get_file_signature(model_path):
+                return entry['model']
+
+            # a touched but identical file keeps the loaded model
+            if entry is not None and entry['file_hash'] == self.get_file_hash(model_path):
+                entry['signature'] = self.get_file_signature(model_path)
+                return entry['model']
+
+            try:
+                new_entry = self.load(model_path)
+            except Exception:
+                # e.g. a model file caught mid-write; the previous model keeps serving
+                if entry is None:
+                    raise
+                traceback.print_exc()
+                return entry['model']
+
+            if entry is not None:
+                new_entry['n_loads'] = entry['n_loads'] + 1
+            # swapping the whole entry so readers see either the old or the new model
+            self.entries[model_path] = new_entry
+            return new_entry['model']
+
+    def invalidate(
+        self,
+        model_path=None
+    ):
+        """
+        """
+        with self.lock:
+            if model_path is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(model_path, None)
+
+    def stats(
+        self
+    ):
+        """
+        """
+        return pd.DataFrame(
+            [
+                {'model_path': model_path, **{x: y for x, y in entry.items() if x != 'model'}}
+                for model_path, entry in list(self.entries.items())
+            ],
+            columns=[
+                'model_path', 'signature', 'file_hash', 'loaded_at', 'load_seconds',
+                'file_bytes', 'rss_delta_bytes', 'n_loads'
+            ]
+        )
+
+
+mr__i = ModelRegistry()
+
+
+if __name__ == '__main__':
+    # python -m helpers.model_registry_helpers <model_path> [<model_path> ...]
+    import sys
+
+    for model_path in sys.argv[1:]:
+        mr__i.get(model_path)
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(mr__i.stats())
@@ -20,11 +20,13 @@ class PlottingHelpers():
     
     def plot_stock_decomposition(
         self,
-        decomposition,
         ticker
     ):
         """
         """
+        # from the session's decomposition cache, decomposing only on a miss
+        decomposition = dmh__i.get_ts_decomposition(ticker)
+        
         # creating the subplots
         fig = make_subplots(
             rows=3,
@@ -0,0 +1,260 @@
+# ----- Imports -----
+import joblib
+
+from datetime import datetime
+import os
+import shutil
+from dotenv import load_dotenv
+import threading
+import traceback
+
+from helpers.data_manipulation_helpers import DataManipulationHelpers, tc__i
+
+# ----- Precompute -----
+
+load_dotenv()
+PRECOMPUTE_LOCATION = os.getenv('PRECOMPUTE_LOCATION', 'data/precompute')
+PRECOMPUTE_SESSIONS_TO_KEEP = int(os.getenv('PRECOMPUTE_SESSIONS_TO_KEEP', 3))
+PRECOMPUTE_RETRY_SECONDS = float(os.getenv('PRECOMPUTE_RETRY_SECONDS', 15 * 60))
+
+# artifact name -> DataManipulationHelpers call producing it, all of which only change
+# once a session closes
+PRECOMPUTE_ARTIFACTS = {
+    'fy_scores': lambda dmh: dmh.score_fy_models(),
+    'ymal_risk_table': lambda dmh: dmh.calculate_ymal_risk_table(),
+    'neighbour_index': lambda dmh: dmh.build_neighbour_index(),
+    'seasonality_summaries': lambda dmh: dmh.calculate_seasonality_summaries(),
+    'association_rule_index': lambda dmh: dmh.gen_association_rules(),
+    'latest_snapshot': lambda dmh: dmh.latest_snapshot(),
+}
+
+class PrecomputeStore():
+    """
+    """
+
+    def __init__(
+        self,
+        store_location=PRECOMPUTE_LOCATION
+    ):
+        """
+        """
+        # <store_location>/<session date>/<artifact name>.joblib
+        self.store_location = store_location
+        self.loaded = {}
+        self.lock = threading.Lock()
+
+    def get_session_location(
+        self,
+        session=None
+    ):
+        """
+        """
+        session = tc__i.get_most_recent_closed_session() if session is None else session
+        return os.path.join(self.store_location, session.isoformat())
+
+    def get_artifact_path(
+        self,
+        name,
+        session=None
+    ):
+        """
+        """
+        return os.path.join(self.get_session_location(session), f"{name}.joblib")
+
+    def has(
+        self,
+        name,
+        session=None
+    ):
+        """
+        """
+        return os.path.exists(self.get_artifact_path(name, session))
+
+    def save(
+        self,
+        name,
+        value,
+        session=None
+    ):
+        """
+        """
+        artifact_path = self.get_artifact_path(name, session)
+        os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+
+        # written next to the target and renamed so readers never see a partial file
+        tmp_path = f"{artifact_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        joblib.dump(value, tmp_path)
+        os.replace(tmp_path, artifact_path)
+        with self.lock:
+            self.loaded[artifact_path] = value
+
+    def load(
+        self,
+        name,
+        session=None
+    ):
+        """
+        """
+        # None when the artifact has not been computed for the session yet
+        artifact_path = self.get_artifact_path(name, session)
+        with self.lock:
+            if artifact_path in self.loaded:
+                return self.loaded[artifact_path]
+        if not os.path.exists(artifact_path):
+            return None
+
+        value = joblib.load(artifact_path)
+        with self.lock:
+            self.loaded[artifact_path] = value
+        return value
+
+    def evict(
+        self,
+        name,
+        session=None
+    ):
+        """
+        """
+        # dropping the in-memory copy, so the next load reads the file again
+        with self.lock:
+            self.loaded.pop(self.get_artifact_path(name, session), None)
+
+    def prune(
+        self,
+        sessions_to_keep=PRECOMPUTE_SESSIONS_TO_KEEP
+    ):
+        """
+        """
+        if not os.path.isdir(self.store_location):
+            return []
+        sessions = sorted(os.listdir(self.store_location))
+        pruned_sessions = sessions[:max(len(sessions) - sessions_to_keep, 0)]
+        for session in pruned_sessions:
+            session_location = os.path.join(self.store_location, session)
+            shutil.rmtree(session_location, ignore_errors=True)
+            with self.lock:
+                self.loaded = {
+                    x: y for x, y in self.loaded.items()
+                    if not x.startswith(session_location + os.sep)
+                }
+        return pruned_sessions
+
+
+class PrecomputeJob():
+    """
+    """
+
+    def __init__(
+        self,
+        precompute_store=None,
+        artifacts=PRECOMPUTE_ARTIFACTS
+    ):
+        """
+        """
+        self.precompute_store = pcs__i if precompute_store is None else precompute_store
+        self.artifacts = artifacts
+        self.dmh = DataManipulationHelpers()
+
+    def is_complete(
+        self,
+        session=None
+    ):
+        """
+        """
+        return all(self.precompute_store.has(name, session) for name in self.artifacts)
+
+    def run(
+        self,
+        force=False
+    ):
+        """
+        """
+        # computing every artifact for the most recent closed session that is not stored yet
+        session = tc__i.get_most_recent_closed_session()
+        computed = []
+        failed = []
+        for name, compute_fn in self.artifacts.items():
+            if force or not self.precompute_store.has(name, session):
+                # one failing artifact (e.g. a missing model file) should not hold back the rest
+                try:
+                    self.precompute_store.save(name, compute_fn(self.dmh), session)
+                    computed.append(name)
+                except Exception:
+                    traceback.print_exc()
+                    failed.append(name)
+        self.precompute_store.prune()
+        return {
+            'session': session,
+            'computed': computed,
+            'failed': failed
+        }
+
+
+class PrecomputeScheduler(threading.Thread):
+    """
+    """
+
+    def __init__(
+        self,
+        precompute_job=None
+    ):
+        """
+        """
+        super().__init__(name='precompute-scheduler', daemon=True)
+        self.precompute_job = PrecomputeJob() if precompute_job is None else precompute_job
+        self.stop_event = threading.Event()
+
+    def run(
+        self
+    ):
+        """
+        """
+        # catching up on start, then running once each session's bars are final (16:30 ET
+        # on regular days, 13:30 ET on early closes)
+        while not self.stop_event.is_set():
+            try:
+                job_output = self.precompute_job.run()
+                next_run_time = tc__i.get_next_data_ready_time()
+                wait_seconds = (next_run_time - datetime.now(next_run_time.tzinfo)).total_seconds()
+                if job_output['failed']:
+                    wait_seconds = min(wait_seconds, PRECOMPUTE_RETRY_SECONDS)
+            except Exception:
+                traceback.print_exc()
+                wait_seconds = PRECOMPUTE_RETRY_SECONDS
+            self.stop_event.wait(max(wait_seconds, 0))
+
+    def stop(
+        self
+    ):
+        """
+        """
+        self.stop_event.set()
+
+
+pcs__i = PrecomputeStore()
+precompute_scheduler = None
+precompute_scheduler_lock = threading.Lock()
+
+def start_precompute_scheduler():
+    """
+    """
+    # streamlit re-executes the app script on every interaction, so the scheduler is
+    # started at most once per process
+    global precompute_scheduler
+    with precompute_scheduler_lock:
+        if precompute_scheduler is None or not precompute_scheduler.is_alive():
+            precompute_scheduler = PrecomputeScheduler()
+            precompute_scheduler.start()
+        return precompute_scheduler
+
+
+if __name__ == '__main__':
+    # python -m helpers.precompute_helpers [--force]
+    # e.g. from cron shortly after 16:30 US/Eastern
+    import sys
+
+    job_output = PrecomputeJob().run(force='--force' in sys.argv)
+    print(f"Precomputed {job_output['computed']} for session {job_output['session']} in {PRECOMPUTE_LOCATION}")
+    if job_output['failed']:
+        print(f"Failed to precompute {job_output['failed']}")
+        sys.exit(1)
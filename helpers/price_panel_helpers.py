@@ -0,0 +1,202 @@
+# ----- Imports -----
+import pandas as pd
+import numpy as np
+
+# ----- PricePanel -----
+
+class PricePanel():
+    """
+    """
+
+    def __init__(
+        self,
+        dates,
+        tickers,
+        fields
+    ):
+        """
+        """
+        # fields maps e.g. 'Close' -> (n_dates, n_tickers) float64 matrix; Fortran order
+        # keeps each ticker's column contiguous so column slices are zero-copy views
+        self.dates = pd.DatetimeIndex(dates, name='Date')
+        self.tickers = list(tickers)
+        self.ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.fields = fields
+
+    @classmethod
+    def from_long_frame(
+        cls,
+        df,
+        tickers=None,
+        fields=('Close', 'Volume')
+    ):
+        """
+        """
+        if 'Date' not in df.columns:
+            df = df.reset_index()
+        row_dates = pd.DatetimeIndex(df['Date'])
+        dates = row_dates.unique().sort_values()
+        tickers = list(pd.unique(df['ticker'])) if tickers is None else list(tickers)
+
+        row_positions = dates.get_indexer(row_dates)
+        col_positions = pd.Index(tickers).get_indexer(df['ticker'])
+        in_panel = col_positions >= 0
+        row_positions, col_positions = row_positions[in_panel], col_positions[in_panel]
+
+        panel_fields = {}
+        for field in fields:
+            values = np.full((len(dates), len(tickers)), np.nan, dtype=np.float64, order='F')
+            values[row_positions, col_positions] = df[field].to_numpy(dtype=np.float64)[in_panel]
+            panel_fields[field] = values
+        return cls(dates, tickers, panel_fields)
+
+    def __len__(
+        self
+    ):
+        """
+        """
+        return len(self.dates)
+
+    @property
+    def nbytes(
+        self
+    ):
+        """
+        """
+        return sum(values.nbytes for values in self.fields.values())
+
+    def get(
+        self,
+        field='Close'
+    ):
+        """
+        """
+        return self.fields[field]
+
+    def column(
+        self,
+        field,
+        ticker
+    ):
+        """
+        """
+        return self.fields[field][:, self.ticker_index[ticker]]
+
+    def get_series(
+        self,
+        field,
+        ticker
+    ):
+        """
+        """
+        return pd.Series(self.column(field, ticker), index=self.dates, name=field, copy=False)
+
+    def get_ticker_frame(
+        self,
+        ticker,
+        fields=None
+    ):
+        """
+        """
+        # the long format the per-ticker helpers (e.g. calculate_rsi) expect
+        fields = list(self.fields) if fields is None else fields
+        ticker_df = pd.DataFrame({field: self.column(field, ticker) for field in fields}, index=self.dates)
+        ticker_df = ticker_df.dropna(how='all').reset_index()
+        ticker_df['ticker'] = ticker
+        return ticker_df
+
+    def slice_rows(
+        self,
+        row_slice
+    ):
+        """
+        """
+        # basic slicing of the rows keeps every field a view of this panel
+        return PricePanel(
+            self.dates[row_slice],
+            self.tickers,
+            {field: values[row_slice] for field, values in self.fields.items()}
+        )
+
+    def since(
+        self,
+        start_date
+    ):
+        """
+        """
+        return self.slice_rows(slice(self.dates.searchsorted(pd.Timestamp(start_date)), None))
+
+    def tail(
+        self,
+        n_rows
+    ):
+        """
+        """
+        return self.slice_rows(slice(max(len(self.dates) - n_rows, 0), None))
+
+    def select(
+        self,
+        tickers
+    ):
+        """
+        """
+        col_positions = [self.ticker_index[ticker] for ticker in tickers]
+        return PricePanel(
+            self.dates,
+            tickers,
+            {field: np.asfortranarray(values[:, col_positions]) for field, values in self.fields.items()}
+        )
+
+    def get_returns(
+        self,
+        field='Close'
+    ):
+        """
+        """
+        # simple returns between consecutive non-missing values; a missing bar is NaN
+        # and the next bar's return is measured against the last value before the gap
+        values = self.fields[field]
+        filled_values = pd.DataFrame(values).ffill().to_numpy()
+        returns = np.full(values.shape, np.nan, order='F')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns[1:] = values[1:] / filled_values[:-1] - 1
+        return returns
+
+    def get_last_valid(
+        self,
+        field='Close',
+        n_values=1
+    ):
+        """
+        """
+        # the last `n_values` non-missing values per ticker, shape (n_values, n_tickers),
+        # along with the row positions they came from (-1 when a ticker has too few values)
+        values = self.fields[field]
+        is_valid = ~np.isnan(values)
+        valid_rank = is_valid[::-1].cumsum(axis=0)[::-1]
+
+        last_values = np.full((n_values, len(self.tickers)), np.nan)
+        last_rows = np.full((n_values, len(self.tickers)), -1)
+        for i in range(n_values):
+            # the i-th most recent valid row is the one whose reversed valid count is i + 1
+            is_match = is_valid & (valid_rank == i + 1)
+            has_match = is_match.any(axis=0)
+            rows = is_match.argmax(axis=0)
+            cols = np.flatnonzero(has_match)
+            last_values[n_values - 1 - i, cols] = values[rows[cols], cols]
+            last_rows[n_values - 1 - i, cols] = rows[cols]
+        return last_values, last_rows
+
+    def to_long_frame(
+        self,
+        fields=None
+    ):
+        """
+        """
+        fields = list(self.fields) if fields is None else fields
+        long_df = pd.DataFrame({
+            'Date': np.repeat(self.dates.to_numpy(), len(self.tickers)),
+            'ticker': np.tile(np.array(self.tickers, dtype=object), len(self.dates)),
+            **{field: self.fields[field].ravel(order='C') for field in fields}
+        })
+        return long_df.dropna(subset=fields, how='all').reset_index(drop=True)
@@ -0,0 +1,284 @@
+# ----- Imports -----
+import pandas as pd
+
+import os
+from dotenv import load_dotenv
+import sqlite3
+import threading
+from contextlib import closing
+
+# ----- PriceStore -----
+
+load_dotenv()
+# one store per market data provider, so bars recorded from replay fixtures are never
+# served (or marked covered) once MARKET_DATA_PROVIDER is back to yfinance
+PRICE_STORE_LOCATION = os.getenv(
+    'PRICE_STORE_LOCATION',
+    f"data/price_store_{os.getenv('MARKET_DATA_PROVIDER', 'yfinance')}.db"
+)
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+OHLCV_SQL_COLUMNS = ['open', 'high', 'low', 'close', 'adj_close', 'volume']
+
+class PriceStore():
+    """
+    """
+
+    def __init__(
+        self,
+        store_path=PRICE_STORE_LOCATION
+    ):
+        """
+        """
+        self.store_path = store_path
+        self.write_lock = threading.Lock()
+
+        store_dir = os.path.dirname(self.store_path)
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+
+        with closing(self.connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS bars (
+                    ticker TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    adj_close REAL,
+                    volume INTEGER,
+                    PRIMARY KEY (ticker, date)
+                ) WITHOUT ROWID
+                """
+            )
+            # [start_date, end_date) ranges whose bars are final and fully stored
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS coverage (
+                    ticker TEXT NOT NULL,
+                    start_date TEXT NOT NULL,
+                    end_date TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS coverage_ticker ON coverage (ticker)')
+
+    def connect(
+        self
+    ):
+        """
+        """
+        return sqlite3.connect(self.store_path, timeout=30)
+
+    def get_coverage(
+        self,
+        tickers
+    ):
+        """
+        """
+        coverage = {ticker: [] for ticker in tickers}
+        # `IN ()` is not valid SQL
+        if len(coverage) == 0:
+            return coverage
+        with closing(self.connect()) as conn:
+            rows = conn.execute(
+                f"""
+                SELECT ticker, start_date, end_date FROM coverage
+                WHERE ticker IN ({','.join('?' * len(tickers))})
+                ORDER BY ticker, start_date
+                """,
+                list(tickers)
+            ).fetchall()
+        for ticker, start_date, end_date in rows:
+            coverage[ticker].append((start_date, end_date))
+        return coverage
+
+    def find_missing_ranges(
+        self,
+        tickers,
+        start_date,
+        end_date
+    ):
+        """
+        """
+        # grouping tickers by identical gaps so each gap is one bulk download
+        start_date, end_date = start_date.isoformat(), end_date.isoformat()
+        missing_ranges = {}
+
+        for ticker, covered_ranges in self.get_coverage(tickers).items():
+            gap_start = start_date
+            for covered_start, covered_end in covered_ranges:
+                if covered_end <= gap_start:
+                    continue
+                if covered_start >= end_date:
+                    break
+                if covered_start > gap_start:
+                    missing_ranges.setdefault((gap_start, covered_start), []).append(ticker)
+                gap_start = max(gap_start, covered_end)
+            if gap_start < end_date:
+                missing_ranges.setdefault((gap_start, end_date), []).append(ticker)
+
+        return {
+            (pd.Timestamp(gap_start).date(), pd.Timestamp(gap_end).date()): gap_tickers
+            for (gap_start, gap_end), gap_tickers in missing_ranges.items()
+        }
+
+    def write_bars(
+        self,
+        df,
+        start_date,
+        end_date,
+        complete_until
+    ):
+        """
+        """
+        # bars on or after `complete_until` are stored but not marked as covered,
+        # so an unfinished session is fetched again on the next request
+        bars_df = df.reset_index()
+        bars_df['date'] = pd.to_datetime(bars_df['Date']).dt.strftime('%Y-%m-%d')
+        bars_df = bars_df.reindex(columns=['ticker', 'date'] + OHLCV_COLUMNS)
+        bars_df = bars_df.astype(object).where(bars_df.notna(), None)
+
+        coverage_end = min(end_date, complete_until)
+        covered_rows = []
+        if start_date < coverage_end:
+            covered_rows = [
+                (ticker, start_date.isoformat(), coverage_end.isoformat())
+                for ticker in bars_df['ticker'].unique()
+            ]
+
+        with self.write_lock, closing(self.connect()) as conn, conn:
+            conn.executemany(
+                f"""
+                INSERT OR REPLACE INTO bars (ticker, date, {', '.join(OHLCV_SQL_COLUMNS)})
+                VALUES ({', '.join('?' * (len(OHLCV_SQL_COLUMNS) + 2))})
+                """,
+                bars_df.itertuples(index=False, name=None)
+            )
+            conn.executemany(
+                'INSERT INTO coverage (ticker, start_date, end_date) VALUES (?, ?, ?)',
+                covered_rows
+            )
+
+    def read_bars(
+        self,
+        tickers,
+        start_date,
+        end_date
+    ):
+        """
+        """
+        if len(tickers) == 0:
+            return pd.DataFrame(columns=OHLCV_COLUMNS + ['ticker'], index=pd.DatetimeIndex([], name='Date'))
+        with closing(self.connect()) as conn:
+            df = pd.read_sql_query(
+                f"""
+                SELECT date, {', '.join(OHLCV_SQL_COLUMNS)}, ticker FROM bars
+                WHERE ticker IN ({','.join('?' * len(tickers))})
+                AND date >= ? AND date < ?
+                ORDER BY date, ticker
+                """,
+                conn,
+                params=list(tickers) + [start_date.isoformat(), end_date.isoformat()]
+            )
+        df.columns = ['Date'] + OHLCV_COLUMNS + ['ticker']
+        df['Date'] = pd.to_datetime(df['Date'])
+        return df.set_index('Date')
+
+    def compact(
+        self
+    ):
+        """
+        """
+        # merging overlapping and adjacent coverage ranges, then reclaiming space
+        with self.write_lock, closing(self.connect()) as conn:
+            with conn:
+                rows = conn.execute(
+                    'SELECT ticker, start_date, end_date FROM coverage ORDER BY ticker, start_date'
+                ).fetchall()
+
+                merged_rows = []
+                for ticker, start_date, end_date in rows:
+                    if merged_rows and merged_rows[-1][0] == ticker and start_date <= merged_rows[-1][2]:
+                        merged_rows[-1][2] = max(merged_rows[-1][2], end_date)
+                    else:
+                        merged_rows.append([ticker, start_date, end_date])
+
+                conn.execute('DELETE FROM coverage')
+                conn.executemany(
+                    'INSERT INTO coverage (ticker, start_date, end_date) VALUES (?, ?, ?)',
+                    merged_rows
+                )
+            conn.execute('VACUUM')
+            conn.execute('ANALYZE')
+
+        return {
+            'coverage_ranges_before': len(rows),
+            'coverage_ranges_after': len(merged_rows)
+        }
+
+    def describe(
+        self
+    ):
+        """
+        """
+        with closing(self.connect()) as conn:
+            bars_df = pd.read_sql_query(
+                """
+                SELECT ticker, COUNT(*) AS n_bars, MIN(date) AS first_date, MAX(date) AS last_date
+                FROM bars GROUP BY ticker
+                """,
+                conn
+            )
+            coverage_df = pd.read_sql_query(
+                """
+                SELECT ticker, COUNT(*) AS n_coverage_ranges, MIN(start_date) AS covered_from,
+                MAX(end_date) AS covered_until
+                FROM coverage GROUP BY ticker
+                """,
+                conn
+            )
+
+        store_df = (
+            bars_df
+            .merge(coverage_df, on='ticker', how='outer')
+            .sort_values('ticker')
+            .reset_index(drop=True)
+        )
+        store_df.attrs['store_path'] = self.store_path
+        store_df.attrs['size_bytes'] = os.path.getsize(self.store_path)
+        return store_df
+
+    def clear(
+        self,
+        tickers=None
+    ):
+        """
+        """
+        with self.write_lock, closing(self.connect()) as conn, conn:
+            if tickers is None:
+                conn.execute('DELETE FROM bars')
+                conn.execute('DELETE FROM coverage')
+            else:
+                placeholders = ','.join('?' * len(tickers))
+                conn.execute(f'DELETE FROM bars WHERE ticker IN ({placeholders})', list(tickers))
+                conn.execute(f'DELETE FROM coverage WHERE ticker IN ({placeholders})', list(tickers))
+
+
+if __name__ == '__main__':
+    # python -m helpers.price_store_helpers [describe|compact]
+    import sys
+
+    ps__i = PriceStore()
+    command = sys.argv[1] if len(sys.argv) > 1 else 'describe'
+
+    if command == 'compact':
+        print(ps__i.compact())
+    else:
+        store_df = ps__i.describe()
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(store_df)
+        print(f"{store_df.attrs['store_path']}: {store_df.attrs['size_bytes']:,} bytes")
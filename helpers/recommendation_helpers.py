@@ -0,0 +1,224 @@
+# ----- Imports -----
+import threading
+
+from helpers.association_rule_helpers import ASSOCIATION_BACKEND, ASSOCIATION_RULES_MIN_SUPPORT, chc__i
+from helpers.data_manipulation_helpers import DataManipulationHelpers, tc__i
+from helpers.decomposition_helpers import Decomposition, dh__i
+from helpers.precompute_helpers import PRECOMPUTE_ARTIFACTS, pcs__i
+
+# ----- RecommendationService -----
+
+class RecommendationService():
+    """
+    """
+    # memo entries derived from an artifact, dropped whenever it is invalidated
+    derived_memo = {
+        'seasonality_summaries': ['seeded_decompositions', 'ticker_seasonality_summaries'],
+    }
+
+    def __init__(
+        self,
+        precompute_store=pcs__i,
+        artifacts=PRECOMPUTE_ARTIFACTS
+    ):
+        """
+        """
+        # name -> {'session': ..., 'value': ...}; every artifact is computed on first access
+        # and kept until the next session closes, shared by every page in the process
+        self.precompute_store = precompute_store
+        self.artifacts = artifacts
+        self.dmh = DataManipulationHelpers()
+        self.memo = {}
+        # invalidated artifacts, recomputed on their next access rather than read from the store
+        self.stale = set()
+        self.lock = threading.Lock()
+        self.artifact_locks = {}
+
+    def get(
+        self,
+        name
+    ):
+        """
+        """
+        session = tc__i.get_most_recent_closed_session()
+        with self.lock:
+            entry = self.memo.get(name)
+            if entry is not None and entry['session'] == session:
+                return entry['value']
+            artifact_lock = self.artifact_locks.setdefault(name, threading.Lock())
+
+        # one computation per artifact; concurrent readers wait for it instead of repeating it
+        with artifact_lock:
+            with self.lock:
+                entry = self.memo.get(name)
+                if entry is not None and entry['session'] == session:
+                    return entry['value']
+
+            with self.lock:
+                is_stale = name in self.stale
+            value = None if is_stale else self.precompute_store.load(name, session)
+            if value is None:
+                value = self.artifacts[name](self.dmh)
+            if is_stale:
+                # written back so the store (and every other reader) serves the recomputed value
+                self.precompute_store.save(name, value, session)
+            with self.lock:
+                self.memo[name] = {'session': session, 'value': value}
+                self.stale.discard(name)
+            return value
+
+    def invalidate(
+        self,
+        name=None
+    ):
+        """
+        """
+        # `name` (every artifact when None) is recomputed on its next access
+        names = list(self.artifacts) if name is None else [name]
+        with self.lock:
+            for x in names:
+                for memo_name in [x] + self.derived_memo.get(x, []):
+                    self.memo.pop(memo_name, None)
+                self.stale.add(x)
+        for x in names:
+            self.precompute_store.evict(x)
+
+    def get_fy_scores(
+        self
+    ):
+        """
+        """
+        return self.get('fy_scores')
+
+    def get_fy_recommendations(
+        self,
+        quick_fy=False
+    ):
+        """
+        """
+        return self.dmh.claculate_fy_recommended_stocks(
+            None,
+            quick_fy=quick_fy,
+            fy_scores_df=self.get_fy_scores()
+        )['recommended_stocks']
+
+    def get_ymal_recommendations(
+        self,
+        risk_level
+    ):
+        """
+        """
+        return self.dmh.calculate_ymal_recommended_stocks(risk_level, risk_table=self.get('ymal_risk_table'))
+
+    def get_neighbour_index(
+        self
+    ):
+        """
+        """
+        return self.get('neighbour_index')
+
+    def get_association_rules(
+        self
+    ):
+        """
+        """
+        return self.get('association_rule_index')
+
+    def get_investors_also_bought(
+        self,
+        ticker,
+        n_tickers=3
+    ):
+        """
+        """
+        # what investors holding `ticker` also hold, as a list of consequents (each a list of
+        # tickers held together), None when there are none: the strongest mined rule's
+        # consequent, or the `n_tickers` strongest pairs from the live co-holding counts,
+        # each its own single-ticker consequent
+        if ASSOCIATION_BACKEND == 'counts':
+            also_held_df = chc__i.get_also_held(ticker)
+            also_held_df = also_held_df[also_held_df['support'] >= ASSOCIATION_RULES_MIN_SUPPORT]
+            return [[x] for x in also_held_df['ticker'][:n_tickers]] if len(also_held_df) > 0 else None
+
+        investors_also_bought = self.dmh.gen_investors_also_bought(self.get_association_rules(), ticker)
+        return [sorted(investors_also_bought.iloc[0]['consequents'])] if investors_also_bought is not None else None
+
+    def update_co_holdings(
+        self,
+        user,
+        portfolio
+    ):
+        """
+        """
+        # after every recorded transaction, so the co-holding counts never need a batch job;
+        # nothing reads the counts under the rules backend, so they are not kept there
+        if ASSOCIATION_BACKEND == 'counts':
+            chc__i.update_portfolio(user, portfolio)
+
+    def get_latest_snapshot(
+        self
+    ):
+        """
+        """
+        return self.get('latest_snapshot')
+
+    def seed_decompositions(
+        self,
+        session,
+        seasonality_summaries
+    ):
+        """
+        """
+        # once per session, adding precomputed decompositions to the cache the plots read
+        # from (summaries stored before decompositions were compacted are skipped)
+        with self.lock:
+            if self.memo.get('seeded_decompositions', {}).get('session') == session:
+                return
+            self.memo['seeded_decompositions'] = {'session': session, 'value': True}
+        for x, y in seasonality_summaries.items():
+            if isinstance(y['decomposition'], Decomposition):
+                dh__i.add_decomposition(x, session, y['decomposition'])
+
+    def get_seasonality_summaries(
+        self
+    ):
+        """
+        """
+        # every ticker's summary, batch-decomposed for the whole universe when not precomputed
+        seasonality_summaries = self.get('seasonality_summaries')
+        self.seed_decompositions(tc__i.get_most_recent_closed_session(), seasonality_summaries)
+        return seasonality_summaries
+
+    def get_seasonality_summary(
+        self,
+        ticker
+    ):
+        """
+        """
+        # the precomputed summaries when available; otherwise only the requested ticker is
+        # decomposed and memoized, None when it has too little history
+        session = tc__i.get_most_recent_closed_session()
+        with self.lock:
+            entry = self.memo.get('seasonality_summaries')
+            seasonality_summaries = entry['value'] if entry is not None and entry['session'] == session else None
+            is_stale = 'seasonality_summaries' in self.stale
+        if is_stale:
+            # invalidated: never read from the store, recomputed (and written back) by get()
+            return self.get_seasonality_summaries().get(ticker)
+        if seasonality_summaries is None:
+            seasonality_summaries = self.precompute_store.load('seasonality_summaries', session)
+        if seasonality_summaries is not None:
+            self.seed_decompositions(session, seasonality_summaries)
+            return seasonality_summaries.get(ticker)
+
+        with self.lock:
+            entry = self.memo.get('ticker_seasonality_summaries')
+            if entry is None or entry['session'] != session:
+                entry = {'session': session, 'value': {}}
+                self.memo['ticker_seasonality_summaries'] = entry
+        if ticker not in entry['value']:
+            entry['value'][ticker] = self.dmh.calculate_seasonality_summaries([ticker]).get(ticker)
+        return entry['value'][ticker]
+
+
+rs__i = RecommendationService()
@@ -0,0 +1,87 @@
+# ----- Imports -----
+import pandas as pd
+import numpy as np
+
+# ----- SeasonalityHelpers -----
+
+class SeasonalityHelpers():
+    """
+    """
+
+    def __init__(self):
+        """
+        """
+        pass
+
+    def calculate_typical_extreme_month(
+        self,
+        seasonal_values,
+        years,
+        months,
+        find_peak=True
+    ):
+        """
+        """
+        # per calendar year, the month of the first highest (lowest) seasonal value, averaged
+        # over every year but the last, which is usually incomplete
+        sort_values = -seasonal_values if find_peak else seasonal_values
+        # lexsort is stable, so ties keep their date order and the first occurrence wins
+        value_order = np.lexsort((sort_values, years))
+        sorted_years = years[value_order]
+        is_year_start = np.ones(len(sorted_years), dtype=bool)
+        is_year_start[1:] = sorted_years[1:] != sorted_years[:-1]
+        extreme_months = months[value_order[is_year_start]]
+        return extreme_months[:-1].astype(np.float64).mean() if len(extreme_months) > 1 else np.nan
+
+    def find_mean_crossings(
+        self,
+        seasonal_values,
+        seasonal_mean
+    ):
+        """
+        """
+        # positions where the series moves strictly from one side of the mean to the other
+        is_above = seasonal_values > seasonal_mean
+        is_below = seasonal_values < seasonal_mean
+        is_crossing = (is_below[:-1] & is_above[1:]) | (is_above[:-1] & is_below[1:])
+        return np.flatnonzero(is_crossing) + 1
+
+    def generate_seasonality_information(
+        self,
+        seasonal
+    ):
+        """
+        """
+        # `seasonal`: the Date-indexed seasonal component of a decomposition
+        seasonal_values = seasonal.to_numpy(dtype=np.float64)
+        seasonal_dates = pd.DatetimeIndex(seasonal.index)
+        seasonal_mean = seasonal.mean()
+
+        years = seasonal_dates.year.to_numpy()
+        months = seasonal_dates.month.to_numpy()
+        is_valid = ~np.isnan(seasonal_values)
+        typical_peak_month, typical_trough_month = [
+            self.calculate_typical_extreme_month(
+                seasonal_values[is_valid],
+                years[is_valid],
+                months[is_valid],
+                find_peak=x
+            )
+            for x in [True, False]
+        ]
+
+        crossings = seasonal_dates[self.find_mean_crossings(seasonal_values, seasonal_mean)]
+        days_between_crossings = np.asarray(crossings[1:] - crossings[:-1]).astype('timedelta64[D]').astype(np.int64)
+        days_between_crossings = days_between_crossings[days_between_crossings > 62]
+
+        estimated_cycle_length = (np.mean(days_between_crossings)) * 2
+        output = {
+            'seasonal_mean': seasonal_mean,
+            'typical_peak_month': typical_peak_month + 0.001,
+            'typical_trough_month': typical_trough_month + 0.001,
+            'estimated_cycle_length': estimated_cycle_length
+        }
+        return output
+
+
+sh__i = SeasonalityHelpers()
@@ -0,0 +1,217 @@
+# ----- Imports -----
+import pandas as pd
+import numpy as np
+
+import os
+from dotenv import load_dotenv
+
+# ----- SimilarityEngine -----
+
+load_dotenv()
+# neighbours kept per ticker for the neighbour lists
+SIMILARITY_NEIGHBOURS = int(os.getenv('SIMILARITY_NEIGHBOURS', 50))
+# width of the float32 embedding portfolio similarities are averaged from
+SIMILARITY_EMBEDDING_DIMENSIONS = int(os.getenv('SIMILARITY_EMBEDDING_DIMENSIONS', 32))
+# 'neighbours' for the top-k NeighbourIndex, 'embeddings' for the StockEmbeddingStore,
+# whose memory grows linearly with the universe
+SIMILARITY_BACKEND = os.getenv('SIMILARITY_BACKEND', 'neighbours')
+
+class SimilarityEngine():
+    """
+    """
+
+    def __init__(
+        self,
+        min_coverage=0.0
+    ):
+        """
+        """
+        # tickers with bars on less than `min_coverage` of the panel's dates are left out;
+        # a ticker without a single bar is always left out
+        self.min_coverage = min_coverage
+
+    def standardize(
+        self,
+        values
+    ):
+        """
+        """
+        # per column like StandardScaler (ddof=0, constant columns left unscaled); missing
+        # bars are set to 0, i.e. the column mean, so they add nothing to any dot product
+        is_missing = np.isnan(values)
+        n_valid = np.maximum((~is_missing).sum(axis=0), 1)
+        filled_values = np.where(is_missing, 0, values)
+        means = filled_values.sum(axis=0) / n_valid
+        deviations = np.where(is_missing, 0, filled_values - means)
+        stds = np.sqrt((deviations ** 2).sum(axis=0) / n_valid)
+        stds[~(stds > 0)] = 1
+        deviations /= stds
+        return deviations
+
+    def build_features(
+        self,
+        price_panel
+    ):
+        """
+        """
+        # (n_tickers, 2 * (n_dates - 1)) standardized closes next to standardized returns,
+        # from the panel's second date on since the first has no return
+        coverage = (~np.isnan(price_panel.get('Close'))).mean(axis=0)
+        is_kept = (coverage > 0) & (coverage >= self.min_coverage)
+        price_panel = price_panel.select([x for x, y in zip(price_panel.tickers, is_kept) if y])
+
+        n_dates = max(len(price_panel) - 1, 0)
+        features = np.empty((len(price_panel.tickers), 2 * n_dates))
+        features[:, :n_dates] = self.standardize(price_panel.get('Close')[1:]).T
+        features[:, n_dates:] = self.standardize(price_panel.get_returns('Close')[1:]).T
+        return price_panel.tickers, features
+
+    def normalize_features(
+        self,
+        features
+    ):
+        """
+        """
+        # rows scaled to unit L2 norm, so dot products are cosine similarities;
+        # an all-zero row stays zero, i.e. 0 similarity to everything
+        norms = np.linalg.norm(features, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return features / norms
+
+    def calculate_similarity_matrix(
+        self,
+        features
+    ):
+        """
+        """
+        # cosine similarity from a single X @ X.T
+        normalized_features = self.normalize_features(features)
+        similarity_matrix = normalized_features @ normalized_features.T
+        np.clip(similarity_matrix, -1, 1, out=similarity_matrix)
+        return similarity_matrix
+
+    def calculate_similarity(
+        self,
+        price_panel
+    ):
+        """
+        """
+        tickers, features = self.build_features(price_panel)
+        similarity_index = pd.Index(tickers, name='ticker')
+        return pd.DataFrame(
+            self.calculate_similarity_matrix(features),
+            columns=similarity_index,
+            index=similarity_index
+        )
+
+    def reduce_features(
+        self,
+        normalized_features,
+        n_dimensions=SIMILARITY_EMBEDDING_DIMENSIONS
+    ):
+        """
+        """
+        # (n_tickers, <= n_dimensions) float32 rows whose dot products are the best rank
+        # `n_dimensions` approximation of the cosine similarities (truncated SVD), exact
+        # when the features have no more columns than that
+        if normalized_features.shape[1] <= n_dimensions:
+            return normalized_features.astype(np.float32)
+        u, singular_values, _ = np.linalg.svd(normalized_features, full_matrices=False)
+        return (u[:, :n_dimensions] * singular_values[:n_dimensions]).astype(np.float32)
+
+    def build_neighbour_index(
+        self,
+        price_panel,
+        n_neighbours=SIMILARITY_NEIGHBOURS,
+        block_size=1024
+    ):
+        """
+        """
+        # the top `n_neighbours` per ticker from `block_size` rows of the similarity
+        # matrix at a time, so the full N x N matrix is never held
+        tickers, features = self.build_features(price_panel)
+        normalized_features = self.normalize_features(features)
+        n_tickers = len(tickers)
+        n_neighbours = max(min(n_neighbours, n_tickers - 1), 0)
+
+        neighbours = np.empty((n_tickers, n_neighbours), dtype=np.int32)
+        scores = np.empty((n_tickers, n_neighbours), dtype=np.float32)
+        for start in range(0, n_tickers if n_neighbours > 0 else 0, block_size):
+            block_similarities = normalized_features[start:start + block_size] @ normalized_features.T
+            block_rows = np.arange(len(block_similarities))
+            # a ticker is never its own neighbour
+            block_similarities[block_rows, start + block_rows] = -np.inf
+
+            top_neighbours = np.argpartition(-block_similarities, n_neighbours - 1, axis=1)[:, :n_neighbours]
+            top_scores = np.take_along_axis(block_similarities, top_neighbours, axis=1)
+            score_order = np.argsort(-top_scores, axis=1, kind='stable')
+            neighbours[start:start + block_size] = np.take_along_axis(top_neighbours, score_order, axis=1)
+            scores[start:start + block_size] = np.clip(np.take_along_axis(top_scores, score_order, axis=1), -1, 1)
+        return NeighbourIndex(tickers, neighbours, scores, self.reduce_features(normalized_features))
+
+
+class NeighbourIndex():
+    """
+    """
+
+    def __init__(
+        self,
+        tickers,
+        neighbours,
+        scores,
+        embeddings
+    ):
+        """
+        """
+        # row i: the positions (int32) and cosine similarities (float32) of ticker i's
+        # nearest tickers, most similar first, and ticker i's reduced float32 embedding
+        # (see SimilarityEngine.reduce_features)
+        self.tickers = list(tickers)
+        self.positions = {x: i for i, x in enumerate(self.tickers)}
+        self.neighbours = neighbours
+        self.scores = scores
+        self.embeddings = embeddings
+
+    def __len__(
+        self
+    ):
+        """
+        """
+        return len(self.tickers)
+
+    def get_neighbours(
+        self,
+        ticker,
+        n_neighbours=3
+    ):
+        """
+        """
+        # most similar first, empty when the ticker is not indexed
+        position = self.positions.get(ticker)
+        if position is None:
+            return []
+        return [self.tickers[x] for x in self.neighbours[position, :n_neighbours]]
+
+    def get_average_similarity(
+        self,
+        tickers
+    ):
+        """
+        """
+        # mean similarity of every indexed ticker to `tickers`, approximated from the
+        # embeddings: the mean of dot products is one matrix-vector product with the mean
+        # embedding, O(n * n_dimensions); tickers that are not indexed are ignored
+        positions = [self.positions[x] for x in dict.fromkeys(tickers) if x in self.positions]
+        if len(positions) == 0:
+            average_similarities = np.zeros(len(self.tickers))
+        else:
+            average_similarities = self.embeddings @ self.embeddings[positions].mean(axis=0)
+            average_similarities = np.clip(average_similarities.astype(np.float64), -1, 1)
+        return pd.Series(
+            average_similarities,
+            index=pd.Index(self.tickers, name='ticker'),
+            name='avg_similarity'
+        )
+
+
+se__i = SimilarityEngine()
@@ -0,0 +1,278 @@
+# ----- Imports -----
+from datetime import date, datetime, time, timedelta
+import pytz
+
+# ----- TradingCalendar -----
+
+# closures outside the regular holiday rules
+NYSE_SPECIAL_CLOSURES = [
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),
+    date(2004, 6, 11),
+    date(2007, 1, 2),
+    date(2012, 10, 29), date(2012, 10, 30),
+    date(2018, 12, 5),
+    date(2025, 1, 9),
+]
+
+class TradingCalendar():
+    """
+    """
+    est_tz = pytz.timezone('US/Eastern')
+    regular_close = time(16, 0)
+    early_close = time(13, 0)
+    # yfinance bars for a session are only reliable a little after the bell
+    data_delay = timedelta(minutes=30)
+
+    def __init__(
+        self,
+        first_year=2000,
+        last_year=None
+    ):
+        """
+        """
+        last_year = datetime.now(self.est_tz).year + 10 if last_year is None else last_year
+        self.first_day = date(first_year, 1, 1)
+        self.last_day = date(last_year, 12, 31)
+
+        self.holidays = set()
+        self.early_closes = set()
+        for year in range(first_year - 1, last_year + 2):
+            self.holidays.update(self.get_nyse_holidays(year))
+            self.early_closes.update(self.get_nyse_early_closes(year))
+        self.holidays.update(NYSE_SPECIAL_CLOSURES)
+
+        # sessions_through[i] is the number of sessions on or before first_day + i days,
+        # which turns every previous/next/between question into a list lookup
+        self.sessions = []
+        self.sessions_through = []
+        day = self.first_day
+        while day <= self.last_day:
+            if day.weekday() < 5 and day not in self.holidays:
+                self.sessions.append(day)
+            self.sessions_through.append(len(self.sessions))
+            day = day + timedelta(days=1)
+
+    def get_easter_sunday(
+        self,
+        year
+    ):
+        """
+        """
+        # anonymous Gregorian algorithm
+        a = year % 19
+        b, c = divmod(year, 100)
+        d, e = divmod(b, 4)
+        f = (b + 8) // 25
+        g = (b - f + 1) // 3
+        h = (19 * a + b - d - g + 15) % 30
+        i, k = divmod(c, 4)
+        l = (32 + 2 * e + 2 * i - h - k) % 7
+        m = (a + 11 * h + 22 * l) // 451
+        month, day = divmod(h + l - 7 * m + 114, 31)
+        return date(year, month, day + 1)
+
+    def get_nth_weekday(
+        self,
+        year,
+        month,
+        weekday,
+        n
+    ):
+        """
+        """
+        # n=-1 gives the last such weekday of the month
+        if n > 0:
+            first_day = date(year, month, 1)
+            offset = (weekday - first_day.weekday()) % 7
+            return first_day + timedelta(days=offset + 7 * (n - 1))
+        next_month = date(year + month // 12, month % 12 + 1, 1)
+        last_day = next_month - timedelta(days=1)
+        return last_day - timedelta(days=(last_day.weekday() - weekday) % 7)
+
+    def get_observed_date(
+        self,
+        holiday
+    ):
+        """
+        """
+        if holiday.weekday() == 5:
+            return holiday - timedelta(days=1)
+        if holiday.weekday() == 6:
+            return holiday + timedelta(days=1)
+        return holiday
+
+    def get_nyse_holidays(
+        self,
+        year
+    ):
+        """
+        """
+        holidays = [
+            self.get_nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+            self.get_nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+            self.get_easter_sunday(year) - timedelta(days=2),  # Good Friday
+            self.get_nth_weekday(year, 5, 0, -1),  # Memorial Day
+            self.get_observed_date(date(year, 7, 4)),  # Independence Day
+            self.get_nth_weekday(year, 9, 0, 1),  # Labor Day
+            self.get_nth_weekday(year, 11, 3, 4),  # Thanksgiving
+            self.get_observed_date(date(year, 12, 25)),  # Christmas
+        ]
+        # NYSE does not close on the Friday before a Saturday New Year's Day
+        new_years_day = date(year, 1, 1)
+        if new_years_day.weekday() != 5:
+            holidays.append(self.get_observed_date(new_years_day))
+        if year >= 2022:
+            holidays.append(self.get_observed_date(date(year, 6, 19)))  # Juneteenth
+        return holidays
+
+    def get_nyse_early_closes(
+        self,
+        year
+    ):
+        """
+        """
+        early_closes = [
+            self.get_nth_weekday(year, 11, 3, 4) + timedelta(days=1),  # day after Thanksgiving
+        ]
+        # the eves of Independence Day and Christmas close early when they are Monday-Thursday
+        for eve in [date(year, 7, 3), date(year, 12, 24)]:
+            if eve.weekday() < 4:
+                early_closes.append(eve)
+        return early_closes
+
+    def get_day_index(
+        self,
+        day
+    ):
+        """
+        """
+        day = day.date() if isinstance(day, datetime) else day
+        if not (self.first_day <= day <= self.last_day):
+            raise ValueError(f"{day} is outside of the trading calendar ({self.first_day} to {self.last_day})")
+        return (day - self.first_day).days
+
+    def is_session(
+        self,
+        day
+    ):
+        """
+        """
+        day_index = self.get_day_index(day)
+        sessions_before = self.sessions_through[day_index - 1] if day_index > 0 else 0
+        return self.sessions_through[day_index] > sessions_before
+
+    def previous_session(
+        self,
+        day,
+        inclusive=False
+    ):
+        """
+        """
+        day_index = self.get_day_index(day) - (0 if inclusive else 1)
+        session_position = self.sessions_through[day_index] - 1 if day_index >= 0 else -1
+        if session_position < 0:
+            raise ValueError(f"No session before {day} in the trading calendar")
+        return self.sessions[session_position]
+
+    def next_session(
+        self,
+        day,
+        inclusive=False
+    ):
+        """
+        """
+        day_index = self.get_day_index(day) - (1 if inclusive else 0)
+        session_position = self.sessions_through[day_index] if day_index >= 0 else 0
+        if session_position >= len(self.sessions):
+            raise ValueError(f"No session after {day} in the trading calendar")
+        return self.sessions[session_position]
+
+    def count_sessions_between(
+        self,
+        start_date,
+        end_date
+    ):
+        """
+        """
+        # sessions in [start_date, end_date), negative when end_date is before start_date;
+        # raises ValueError when either date is outside of the calendar
+        start_index = self.get_day_index(start_date)
+        end_index = self.get_day_index(end_date)
+        sessions_before_start = self.sessions_through[start_index - 1] if start_index > 0 else 0
+        sessions_before_end = self.sessions_through[end_index - 1] if end_index > 0 else 0
+        return sessions_before_end - sessions_before_start
+
+    def get_sessions_between(
+        self,
+        start_date,
+        end_date
+    ):
+        """
+        """
+        start_index = self.get_day_index(start_date)
+        end_index = self.get_day_index(end_date)
+        first_position = self.sessions_through[start_index - 1] if start_index > 0 else 0
+        last_position = self.sessions_through[end_index - 1] if end_index > 0 else 0
+        return self.sessions[first_position:last_position]
+
+    def session_offset(
+        self,
+        day,
+        n_sessions
+    ):
+        """
+        """
+        # the n-th session after `day` (or before it, when n_sessions is negative);
+        # raises ValueError when `day` or that session is outside of the calendar
+        day_index = self.get_day_index(day)
+        if n_sessions > 0:
+            session_position = self.sessions_through[day_index] + n_sessions - 1
+            if session_position >= len(self.sessions):
+                raise ValueError(f"No session {n_sessions} sessions after {day} in the trading calendar")
+            return self.sessions[session_position]
+        if n_sessions == 0:
+            return self.previous_session(day, inclusive=True)
+        sessions_before = self.sessions_through[day_index - 1] if day_index > 0 else 0
+        session_position = sessions_before + n_sessions
+        if session_position < 0:
+            raise ValueError(f"No session {-n_sessions} sessions before {day} in the trading calendar")
+        return self.sessions[session_position]
+
+    def get_session_close(
+        self,
+        day
+    ):
+        """
+        """
+        day = day.date() if isinstance(day, datetime) else day
+        close_time = self.early_close if day in self.early_closes else self.regular_close
+        return self.est_tz.localize(datetime.combine(day, close_time))
+
+    def get_most_recent_closed_session(
+        self,
+        now=None
+    ):
+        """
+        """
+        # the latest session whose bars are final and available
+        now = datetime.now(self.est_tz) if now is None else now.astimezone(self.est_tz)
+        today = now.date()
+        if self.is_session(today) and now >= self.get_session_close(today) + self.data_delay:
+            return today
+        return self.previous_session(today)
+
+    def get_next_data_ready_time(
+        self,
+        now=None
+    ):
+        """
+        """
+        # when the next session's bars become final, i.e. when cached prices go stale
+        now = datetime.now(self.est_tz) if now is None else now.astimezone(self.est_tz)
+        next_session = self.next_session(now.date(), inclusive=True)
+        next_ready_time = self.get_session_close(next_session) + self.data_delay
+        if now >= next_ready_time:
+            next_session = self.next_session(next_session)
+            next_ready_time = self.get_session_close(next_session) + self.data_delay
+        return next_ready_time
+
@@ -15,12 +15,14 @@ from app_pages.welcome_page import WelcomePage
 from app_pages.explore_page import generate_explore_page
 from app_pages.profile_page import generate_profile_page
 from app_pages.ask_me_anything_page import generate_ask_me_anything_page
+from helpers.precompute_helpers import start_precompute_scheduler
 
 load_dotenv()
 users_config_path = os.getenv('USERS_CONFIG_LOCATION')
 current_user_config_path = os.getenv('CURRENT_USERS_CONFIG_LOCATION')
 
 # ----- TradeSocial -----
+start_precompute_scheduler()
 wp__i = WelcomePage()
 show_onboarding_page = False
 